@@ -8,12 +8,28 @@ for use with the Electron desktop application.
 import os
 import sys
 import json
+import logging
 import threading
 import time
+import functools
+import heapq
+import queue
+import re
+import subprocess
+import traceback
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import chromadb
-from sentence_transformers import SentenceTransformer
+import numpy as np
+
+# Optional faster JSON encoder for large search responses
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Configure console encoding for Windows compatibility
 if sys.platform == "win32":
@@ -37,18 +53,38 @@ try:
     from realtime_monitor import RealtimeMonitor
     from main import (
         extract_text, create_large_chunks, create_gist_chunks, create_pinpoint_chunks,
+        extract_and_chunk, extract_chunks_for_update,
         granular_collection, filelevel_collection,
-        model_loading_status
+        model_loading_status, load_model, encode_line_ranges, decode_line_ranges
     )
     from github_integration import GitHubIntegration, ConnectedRepo
     from branch_manifest import manifest_manager
+    from embedding_batcher import EmbeddingBatcher, inference_context
 except ImportError as e:
     print(f"Error importing FileFinder modules: {e}")
     sys.exit(1)
 
+# Debug diagnostics go through logging so they cost nothing unless enabled
+# (set FILEHAWK_LOG_LEVEL=DEBUG to see them)
+logging.basicConfig(
+    level=os.environ.get("FILEHAWK_LOG_LEVEL", LOG_LEVEL).upper(),
+    format="%(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Electron app
 
+def json_response(payload):
+    """jsonify() replacement for large responses, serialized with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        try:
+            return app.response_class(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                                      mimetype="application/json")
+        except TypeError:
+            pass  # A type orjson can't serialize; Flask's encoder handles it below
+    return jsonify(payload)
+
 # Global state
 indexing_status = {
     "is_indexing": False,
@@ -74,6 +110,16 @@ from folder_settings import folder_settings
 GITHUB_CLIENT_ID = "Ov23lin7oNWMsxhBI4Ac"
 github_integration = GitHubIntegration(GITHUB_CLIENT_ID)
 
+def get_hnsw_collection_metadata():
+    """HNSW index parameters passed to ChromaDB when a collection is created"""
+    return {
+        "hnsw:space": HNSW_SPACE,
+        "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": HNSW_SEARCH_EF,
+        "hnsw:M": HNSW_M,
+        "hnsw:num_threads": HNSW_NUM_THREADS or (os.cpu_count() or 1),
+    }
+
 def initialize_collections():
     """Initialize ChromaDB collections for different chunking modes"""
     try:
@@ -84,19 +130,20 @@ def initialize_collections():
         client = chromadb.PersistentClient(path=str(db_dir))
         
         # Create separate collections for each chunking mode
-        gist_collection = client.get_or_create_collection("filefinder_gist")
-        gist_centroids_collection = client.get_or_create_collection("filefinder_gist_centroids")
-        pinpoint_collection = client.get_or_create_collection("filefinder_pinpoint")
+        hnsw_metadata = get_hnsw_collection_metadata()
+        gist_collection = client.get_or_create_collection("filefinder_gist", metadata=hnsw_metadata)
+        gist_centroids_collection = client.get_or_create_collection("filefinder_gist_centroids", metadata=hnsw_metadata)
+        pinpoint_collection = client.get_or_create_collection("filefinder_pinpoint", metadata=hnsw_metadata)
         
         if ENABLE_GRANULAR_CHUNKING:
-            granular_col = client.get_or_create_collection("filefinder_granular")
-            filelevel_col = client.get_or_create_collection("filefinder_filelevel")
+            granular_col = client.get_or_create_collection("filefinder_granular", metadata=hnsw_metadata)
+            filelevel_col = client.get_or_create_collection("filefinder_filelevel", metadata=hnsw_metadata)
             
             # Store client reference
             initialize_collections.client = client
             return granular_col, filelevel_col, gist_collection, gist_centroids_collection, pinpoint_collection
         else:
-            filelevel_col = client.get_or_create_collection("filefinder_filelevel")
+            filelevel_col = client.get_or_create_collection("filefinder_filelevel", metadata=hnsw_metadata)
             
             # Store client reference
             initialize_collections.client = client
@@ -105,95 +152,194 @@ def initialize_collections():
         print(f"Error initializing collections: {e}")
         return None, None, None, None, None
 
-# Initialize the models and collections
+# Initialize the collections; embedding models are loaded lazily on first use
 print("starting filefinder api...")
-print("loading msmarco model for gist mode...")
-gist_model = SentenceTransformer(GIST_EMBEDDING_MODEL)
-print("loading allmini model for pinpoint mode...")
-pinpoint_model = SentenceTransformer(PINPOINT_EMBEDDING_MODEL)
-print("models loaded")
-
-# Optional: warm up models to reduce first-query latency
-try:
-    _ = gist_model.encode("warmup")
-    _ = pinpoint_model.encode("warmup")
-    print("models warmed up")
-except Exception as _warmup_err:
-    print(f"model warmup skipped: {_warmup_err}")
 
 granular_collection, filelevel_collection, gist_collection, gist_centroids_collection, pinpoint_collection = initialize_collections()
 
+@functools.lru_cache(maxsize=4)
 def get_model_for_mode(chunking_mode):
-    """Get the appropriate model for the given chunking mode"""
+    """Get the appropriate model for the given chunking mode (loaded once, then cached)"""
     if chunking_mode == 'gist':
-        return gist_model
-    elif chunking_mode == 'pinpoint':
-        return pinpoint_model
-
-# suggestions endpoint removed
+        return load_model(GIST_EMBEDDING_MODEL)
     else:
-        # Fallback to pinpoint model for legacy modes
-        return pinpoint_model
+        # Pinpoint and legacy modes use the AllMiniLM model
+        return load_model(PINPOINT_EMBEDDING_MODEL)
+
+def warm_up_models():
+    """Load and warm up both models and the vector indexes off the request path to reduce first-query latency"""
+    warmup_embeddings = {}
+    for mode in ('gist', 'pinpoint'):
+        try:
+            warmup_embeddings[mode] = get_model_for_mode(mode).encode("warmup").tolist()
+        except Exception as _warmup_err:
+            print(f"model warmup skipped for {mode}: {_warmup_err}")
+    print("models loaded and warmed up")
+    
+    # A throwaway query makes Chroma load each HNSW index into memory now
+    # instead of on the first real search
+    for mode, collection in (('gist', gist_collection), ('gist', gist_centroids_collection),
+                             ('pinpoint', pinpoint_collection), ('pinpoint', filelevel_collection),
+                             ('pinpoint', granular_collection)):
+        if collection is None or mode not in warmup_embeddings:
+            continue
+        try:
+            if collection.count() > 0:
+                collection.query(query_embeddings=[warmup_embeddings[mode]], n_results=1, include=[])
+        except Exception as _warmup_err:
+            print(f"index warmup skipped for {collection.name}: {_warmup_err}")
+    print("vector indexes warmed up")
+
+@functools.lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE or 1)
+def _encode_query(chunking_mode, query):
+    with inference_context():
+        embedding = get_model_for_mode(chunking_mode).encode(
+            query, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False
+        )
+    embedding.setflags(write=False)  # Shared between requests, must not be mutated
+    return embedding
+
+def encode_query_cached(query, chunking_mode):
+    """
+    Encode a search query, reusing the embedding for repeated queries.
+    Queries differing only in surrounding/repeated whitespace share one cache entry.
+    Both embedding models emit unit vectors; normalizing makes that explicit for any backend.
+    """
+    return _encode_query(chunking_mode, " ".join(query.split()))
+
+# Serializes the collection writes of concurrent sync workers; encoding and
+# extraction still run in parallel
+chroma_write_lock = threading.Lock()
+
+# Persistent pool for reindex/sync jobs started by API requests
+background_pool = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="background")
+_background_jobs = 0
+_background_jobs_lock = threading.Lock()
+
+def _background_job_done(_future):
+    global _background_jobs
+    with _background_jobs_lock:
+        _background_jobs -= 1
+
+def submit_background(fn, *args):
+    """Run fn(*args) on the background pool, tracking queued and running jobs"""
+    global _background_jobs
+    with _background_jobs_lock:
+        _background_jobs += 1
+    future = background_pool.submit(fn, *args)
+    future.add_done_callback(_background_job_done)
+    return future
+
+# Cross-file embedding batchers, one per model, created on first use
+_embedding_batchers = {}
+_embedding_batchers_lock = threading.Lock()
+
+def get_batcher_for_mode(chunking_mode):
+    """Get the shared dynamic embedding batcher for the given chunking mode"""
+    model = get_model_for_mode(chunking_mode)
+    with _embedding_batchers_lock:
+        batcher = _embedding_batchers.get(id(model))
+        if batcher is None:
+            batcher = EmbeddingBatcher(model, name=f"{chunking_mode}-embedder")
+            _embedding_batchers[id(model)] = batcher
+        return batcher
 
 # ------------------------------
 # Helper: filtering utilities
 # ------------------------------
-from datetime import datetime, timedelta
+import fnmatch
+from datetime import datetime
 
+@functools.lru_cache(maxsize=256)
 def _parse_date_to_ts(date_str: str, end_of_day: bool = False) -> float:
-    """Parse YYYY-MM-DD into epoch seconds. If end_of_day, set time to 23:59:59."""
+    """Parse YYYY-MM-DD into epoch seconds (local time). If end_of_day, set time to 23:59:59."""
     try:
         dt = datetime.strptime(date_str, "%Y-%m-%d")
         if end_of_day:
-            dt = dt + timedelta(hours=23, minutes=59, seconds=59)
+            dt = dt.replace(hour=23, minute=59, second=59)
         return dt.timestamp()
     except Exception:
         return 0.0
 
+@functools.lru_cache(maxsize=256)
+def _folder_prefix(folder_path: str) -> str:
+    """Normalized absolute folder path with a trailing separator"""
+    return os.path.normcase(os.path.abspath(folder_path)).rstrip(os.sep) + os.sep
+
 def _is_under_folder(file_path: str, folder_path: str) -> bool:
     try:
-        file_abs = os.path.abspath(file_path)
-        folder_abs = os.path.abspath(folder_path)
-        common = os.path.commonpath([file_abs, folder_abs])
-        return common == folder_abs
+        file_abs = os.path.normcase(os.path.abspath(file_path))
+        folder_prefix = _folder_prefix(folder_path)
+        return file_abs == folder_prefix[:-1] or file_abs.startswith(folder_prefix)
     except Exception:
         return False
 
-def _matches_wildcard_pattern(filename: str, filepath: str, pattern: str) -> bool:
+class _FilePatternSet:
     """
-    Check if a file matches a wildcard pattern.
+    fileTypes filter patterns compiled once per distinct pattern list.
     Supports:
+    - py / .py (plain extension matching)
     - *.ext (extension matching)
     - name* (prefix matching)
     - *name* (substring matching)
     - *name (suffix matching)
     - ? (single character)
     - path/pattern (path-based matching)
-    - !pattern (exclusion - handled by caller)
+    - !pattern (exclusion, checked before inclusions)
+    Wildcards are translated with fnmatch and compiled to case-insensitive regexes.
     """
-    import fnmatch
     
-    pattern = pattern.strip()
-    if not pattern:
-        return False
-    
-    # Handle exclusion patterns (! prefix)
-    if pattern.startswith('!'):
-        return False  # Exclusions handled by caller
+    def __init__(self, patterns):
+        self.exclude_name, self.exclude_path = [], []
+        self.include_name, self.include_path = [], []
+        self.extensions = set()
+        self.has_inclusions = False
+        
+        for pattern in patterns:
+            if pattern.startswith('!'):
+                self._add_wildcard(pattern[1:], self.exclude_name, self.exclude_path)
+                continue
+            
+            self.has_inclusions = True
+            # Check if it's a simple extension (no wildcards)
+            if not any(char in pattern for char in ['*', '?', '/', '\\']):
+                self.extensions.add(pattern.lower().lstrip('.'))
+            else:
+                self._add_wildcard(pattern, self.include_name, self.include_path)
     
-    try:
-        # If pattern contains path separator, match against full path
+    @staticmethod
+    def _add_wildcard(pattern, name_regexes, path_regexes):
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith('!'):
+            return
+        # If pattern contains path separator, match against full path, otherwise filename only
         if '/' in pattern or '\\' in pattern:
-            # Normalize path separators
-            norm_pattern = pattern.replace('\\', '/')
-            norm_filepath = filepath.replace('\\', '/')
-            return fnmatch.fnmatch(norm_filepath.lower(), norm_pattern.lower())
-        
-        # Otherwise match against filename only
-        return fnmatch.fnmatch(filename.lower(), pattern.lower())
+            path_regexes.append(re.compile(fnmatch.translate(pattern.replace('\\', '/').lower())))
+        else:
+            name_regexes.append(re.compile(fnmatch.translate(pattern.lower())))
     
-    except Exception:
-        return False
+    def matches(self, filename: str, filepath: str, file_ext: str) -> bool:
+        name = filename.lower()
+        path = filepath.replace('\\', '/').lower() if (self.exclude_path or self.include_path) else None
+        
+        # Check exclusion patterns first
+        if any(regex.match(name) for regex in self.exclude_name):
+            return False
+        if path is not None and any(regex.match(path) for regex in self.exclude_path):
+            return False
+        
+        if not self.has_inclusions:
+            return True  # No inclusion patterns, only exclusions
+        
+        if self.extensions and file_ext.lower().lstrip('.') in self.extensions:
+            return True
+        if any(regex.match(name) for regex in self.include_name):
+            return True
+        return path is not None and any(regex.match(path) for regex in self.include_path)
+
+@functools.lru_cache(maxsize=128)
+def _compile_file_patterns(patterns: tuple) -> _FilePatternSet:
+    return _FilePatternSet(patterns)
 
 def _matches_file_patterns(filename: str, filepath: str, file_ext: str, patterns: list) -> bool:
     """
@@ -204,71 +350,97 @@ def _matches_file_patterns(filename: str, filepath: str, file_ext: str, patterns
     if not patterns:
         return True
     
-    # Check exclusion patterns first
-    for pattern in patterns:
-        if pattern.startswith('!'):
-            exclude_pattern = pattern[1:]  # Remove ! prefix
-            if _matches_wildcard_pattern(filename, filepath, exclude_pattern):
-                return False
-    
-    # Check inclusion patterns
-    has_inclusion_patterns = any(not p.startswith('!') for p in patterns)
-    if not has_inclusion_patterns:
-        return True  # No inclusion patterns, only exclusions
-    
-    for pattern in patterns:
-        if pattern.startswith('!'):
-            continue  # Skip exclusion patterns
-        
-        # Check if it's a simple extension (no wildcards)
-        if not any(char in pattern for char in ['*', '?', '/', '\\']):
-            # Simple extension matching
-            ext_no_dot = file_ext.lower().lstrip('.')
-            pattern_no_dot = pattern.lower().lstrip('.')
-            if ext_no_dot == pattern_no_dot:
-                return True
-        else:
-            # Wildcard pattern matching
-            if _matches_wildcard_pattern(filename, filepath, pattern):
-                return True
-    
-    return False
+    return _compile_file_patterns(tuple(sorted(patterns))).matches(filename, filepath, file_ext)
 
-def file_matches_filters(file_path: str, file_type: str, filters: dict, metadata: dict = None) -> bool:
+def _last_modified_for_filter(file_path: str) -> float:
+    """Last-modified time used by the timeRange filter: tracker metadata first, then os.stat"""
+    try:
+        last_mod = float(metadata_tracker.metadata.get(file_path, {}).get('last_modified', 0.0))
+    except Exception:
+        last_mod = 0.0
+    if not last_mod:
+        try:
+            last_mod = os.stat(file_path).st_mtime
+        except OSError:
+            last_mod = 0.0
+    return last_mod
+
+# Shared pool for timeRange filter stats; bounds the threads used across concurrent searches
+mtime_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="mtime")
+
+def prefetch_file_mtimes(file_paths, filters: dict) -> dict:
     """
-    Apply server-side filters to a file path using available metadata.
-    - fileTypes: list like ['py','md'] (compare against extension without dot)
-    - searchFolder: string path; require file under this folder
-    - timeRange: { type: 'all'|'before'|'after'|'range', before/after/startDate/endDate: 'YYYY-MM-DD' }
-    - repos: list of GitHub repo names to filter by (e.g., ['owner/repo1', 'owner/repo2'])
-    - repoBranches: dict mapping repo to branches (e.g., {'owner/repo': ['main', 'dev']})
-    - source: filter by source type ('github', 'local', or None for all)
-    Uses MetadataTracker for last_modified; falls back to os.stat if needed.
+    Resolve last-modified times for distinct result paths concurrently, but only
+    when a timeRange filter is active. Returns {path: mtime} for file_matches_filters.
     """
     if not filters or not isinstance(filters, dict):
-        return True
+        return {}
+    time_range = filters.get('timeRange') or {}
+    if not isinstance(time_range, dict) or time_range.get('type', 'all') == 'all':
+        return {}
     
-    # GitHub-specific filters
-    if metadata:
-        # Filter by source (github vs local files)
-        source_filter = filters.get('source')
-        if source_filter:
+    distinct_paths = list(dict.fromkeys(path for path in file_paths if path))
+    if not distinct_paths:
+        return {}
+    return dict(zip(distinct_paths, mtime_pool.map(_last_modified_for_filter, distinct_paths)))
+
+def _time_range_bounds(time_range) -> tuple:
+    """Resolve a timeRange filter into (lower_ts, upper_ts); None means unbounded"""
+    tr_type = time_range.get('type', 'all')
+    lower_ts = upper_ts = None
+    if tr_type == 'before':
+        if time_range.get('before'):
+            upper_ts = _parse_date_to_ts(time_range['before'], end_of_day=True)
+    elif tr_type == 'after':
+        if time_range.get('after'):
+            lower_ts = _parse_date_to_ts(time_range['after'], end_of_day=False)
+    elif tr_type == 'range':
+        if time_range.get('startDate'):
+            lower_ts = _parse_date_to_ts(time_range['startDate'], end_of_day=False)
+        if time_range.get('endDate'):
+            upper_ts = _parse_date_to_ts(time_range['endDate'], end_of_day=True)
+    return lower_ts, upper_ts
+
+def _build_filter_checks(filters: dict) -> list:
+    """
+    Turn a filters dict into an ordered list of checks, cheapest first:
+    metadata lookups, then extension/pattern matching, then folder scoping,
+    and the time range (which may need a stat) last.
+    Each check takes a shared context dict and returns False to reject the file.
+    """
+    checks = []
+    
+    # GitHub-specific filters (only applied when chunk metadata is available)
+    source_filter = filters.get('source')
+    if source_filter:
+        def _check_source(ctx):
+            metadata = ctx['metadata']
+            if not metadata:
+                return True
             file_source = metadata.get('source', 'local')  # Default to 'local' for non-GitHub files
             if source_filter == 'github' and file_source != 'github':
                 return False
             elif source_filter == 'local' and file_source == 'github':
                 return False
-        
-        # Filter by GitHub repositories
-        repos_filter = filters.get('repos')
-        if repos_filter and isinstance(repos_filter, list) and len(repos_filter) > 0:
+            return True
+        checks.append(_check_source)
+    
+    repos_filter = filters.get('repos')
+    if repos_filter and isinstance(repos_filter, list) and len(repos_filter) > 0:
+        def _check_repo(ctx):
+            metadata = ctx['metadata']
+            if not metadata:
+                return True
             file_repo = metadata.get('repo')
-            if not file_repo or file_repo not in repos_filter:
-                return False
-        
-        # Filter by specific branches within repos
-        branches_filter = filters.get('repoBranches')
-        if branches_filter and isinstance(branches_filter, dict):
+            return bool(file_repo) and file_repo in repos_filter
+        checks.append(_check_repo)
+    
+    branches_filter = filters.get('repoBranches')
+    if branches_filter and isinstance(branches_filter, dict):
+        def _check_branch(ctx):
+            metadata = ctx['metadata']
+            if not metadata:
+                return True
             file_repo = metadata.get('repo')
             file_branch = metadata.get('branch')
             if file_repo and file_repo in branches_filter:
@@ -277,75 +449,110 @@ def file_matches_filters(file_path: str, file_type: str, filters: dict, metadata
                     return False
                 elif isinstance(allowed_branches, str) and allowed_branches != 'all' and file_branch != allowed_branches:
                     return False
-
-    # File types filter with wildcard support
+            return True
+        checks.append(_check_branch)
+    
+    # File types filter with wildcard support; plain extensions are a set lookup
     try:
         wanted_types = filters.get('fileTypes') or []
         if isinstance(wanted_types, list) and len(wanted_types) > 0:
-            # Extract filename from path
-            filename = os.path.basename(file_path)
+            pattern_set = _compile_file_patterns(tuple(sorted(wanted_types)))
             
-            # Use new wildcard pattern matching function
-            if not _matches_file_patterns(filename, file_path, file_type or '', wanted_types):
-                return False
+            def _check_types(ctx):
+                file_path = ctx['file_path']
+                try:
+                    return pattern_set.matches(os.path.basename(file_path), file_path, ctx['file_type'] or '')
+                except Exception:
+                    return True
+            checks.append(_check_types)
     except Exception:
         pass
-
+    
     # Folder scoping
-    try:
-        search_folder = filters.get('searchFolder') or None
-        if isinstance(search_folder, str) and search_folder.strip():
-            if not _is_under_folder(file_path, search_folder):
-                return False
-    except Exception:
-        pass
-
+    search_folder = filters.get('searchFolder') or None
+    if isinstance(search_folder, str) and search_folder.strip():
+        def _check_folder(ctx):
+            return _is_under_folder(ctx['file_path'], search_folder)
+        checks.append(_check_folder)
+    
     # Time range filtering
     try:
         time_range = filters.get('timeRange') or {}
-        tr_type = time_range.get('type', 'all')
-        if tr_type != 'all':
-            # obtain last_modified from metadata tracker, fallback to os.stat
-            last_mod = 0.0
-            try:
-                meta = metadata_tracker.metadata.get(file_path, {})
-                last_mod = float(meta.get('last_modified', 0.0))
-                if not last_mod and os.path.exists(file_path):
-                    last_mod = os.stat(file_path).st_mtime
-            except Exception:
-                if os.path.exists(file_path):
-                    try:
-                        last_mod = os.stat(file_path).st_mtime
-                    except Exception:
-                        last_mod = 0.0
-
-            if tr_type == 'before':
-                before_str = time_range.get('before')
-                if before_str:
-                    before_ts = _parse_date_to_ts(before_str, end_of_day=True)
-                    if last_mod > before_ts:
-                        return False
-            elif tr_type == 'after':
-                after_str = time_range.get('after')
-                if after_str:
-                    after_ts = _parse_date_to_ts(after_str, end_of_day=False)
-                    if last_mod < after_ts:
-                        return False
-            elif tr_type == 'range':
-                start_str = time_range.get('startDate')
-                end_str = time_range.get('endDate')
-                if start_str:
-                    start_ts = _parse_date_to_ts(start_str, end_of_day=False)
-                    if last_mod < start_ts:
-                        return False
-                if end_str:
-                    end_ts = _parse_date_to_ts(end_str, end_of_day=True)
-                    if last_mod > end_ts:
-                        return False
+        lower_ts, upper_ts = _time_range_bounds(time_range)
+        if lower_ts is not None or upper_ts is not None:
+            def _check_time(ctx):
+                # obtain last_modified from the caller, else metadata tracker, fallback to os.stat
+                last_mod = ctx['stat_mtime']
+                if last_mod is None:
+                    last_mod = _last_modified_for_filter(ctx['file_path'])
+                if lower_ts is not None and last_mod < lower_ts:
+                    return False
+                if upper_ts is not None and last_mod > upper_ts:
+                    return False
+                return True
+            checks.append(_check_time)
     except Exception:
         pass
+    
+    return checks
+
+def compile_filters(filters: dict):
+    """
+    Prepare filters once per request; returns matches(file_path, file_type, metadata=None, stat_mtime=None).
+    See file_matches_filters for the supported filter keys.
+    """
+    if not filters or not isinstance(filters, dict):
+        return lambda file_path, file_type, metadata=None, stat_mtime=None: True
+    
+    checks = _build_filter_checks(filters)
+    
+    def matches(file_path, file_type, metadata=None, stat_mtime=None):
+        ctx = {
+            'file_path': file_path,
+            'file_type': file_type,
+            'metadata': metadata,
+            'stat_mtime': stat_mtime,
+        }
+        return all(check(ctx) for check in checks)
+    
+    return matches
+
+def filters_to_where(filters: dict):
+    """
+    The part of the search filters Chroma can evaluate itself, as a `where` clause
+    (None if nothing applies), so filtered-out chunks never take result slots.
+    Only exact metadata predicates are pushed down: source == 'github' and the repos list.
+    compile_filters still checks everything, including these, on the returned chunks.
+    """
+    if not filters or not isinstance(filters, dict):
+        return None
+    
+    conditions = []
+    if filters.get('source') == 'github':
+        conditions.append({"source": "github"})
+    repos_filter = filters.get('repos')
+    if repos_filter and isinstance(repos_filter, list):
+        conditions.append({"repo": {"$in": repos_filter}})
+    
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
 
-    return True
+def file_matches_filters(file_path: str, file_type: str, filters: dict, metadata: dict = None,
+                         stat_mtime: float = None) -> bool:
+    """
+    Apply server-side filters to a file path using available metadata.
+    - fileTypes: list like ['py','md'] (compare against extension without dot)
+    - searchFolder: string path; require file under this folder
+    - timeRange: { type: 'all'|'before'|'after'|'range', before/after/startDate/endDate: 'YYYY-MM-DD' }
+    - repos: list of GitHub repo names to filter by (e.g., ['owner/repo1', 'owner/repo2'])
+    - repoBranches: dict mapping repo to branches (e.g., {'owner/repo': ['main', 'dev']})
+    - source: filter by source type ('github', 'local', or None for all)
+    Uses MetadataTracker for last_modified; falls back to os.stat if needed.
+    Pass stat_mtime (see prefetch_file_mtimes) to skip the per-file lookup.
+    For many files, call compile_filters once and reuse the returned predicate.
+    """
+    return compile_filters(filters)(file_path, file_type, metadata, stat_mtime)
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
@@ -439,51 +646,57 @@ def scan_folder_structure():
             return jsonify({"success": False, "error": "Invalid folder path"})
         
         # Scan folder structure with limited depth (max 3 levels to avoid UI overwhelm)
-        def scan_directory(path, current_depth=0, max_depth=3):
-            if current_depth >= max_depth:
-                return None
+        def scan_directory(root_path, max_depth=3):
+            """Breadth-first scandir walk; each queued directory attaches its items to its parent entry"""
+            tree = None
+            pending_dirs = deque([(root_path, 0, None)])  # (path, depth, parent item_info)
+            
+            while pending_dirs:
+                path, current_depth, parent_info = pending_dirs.popleft()
+                try:
+                    with os.scandir(path) as it:
+                        entries = sorted(it, key=lambda entry: entry.name)
+                except OSError:
+                    # Can't read directory
+                    continue
                 
-            items = []
-            try:
-                for item_name in sorted(os.listdir(path)):
+                items = []
+                for entry in entries:
                     # Skip hidden files/folders at root level for cleaner UI
-                    if current_depth == 0 and item_name.startswith('.'):
+                    if current_depth == 0 and entry.name.startswith('.'):
                         continue
-                        
-                    item_path = os.path.join(path, item_name)
                     
                     try:
-                        is_dir = os.path.isdir(item_path)
+                        is_dir = entry.is_dir()
                         item_info = {
-                            'path': item_path,
-                            'name': item_name,
+                            'path': entry.path,
+                            'name': entry.name,
                             'type': 'directory' if is_dir else 'file'
                         }
                         
                         if not is_dir:
                             # Add file size for files
                             try:
-                                item_info['size'] = os.path.getsize(item_path)
-                            except:
+                                item_info['size'] = entry.stat().st_size
+                            except OSError:
                                 item_info['size'] = 0
                         
                         if is_dir and current_depth < max_depth - 1:
-                            # Recursively scan subdirectories
-                            children = scan_directory(item_path, current_depth + 1, max_depth)
-                            if children:
-                                item_info['children'] = children
+                            # Scan subdirectories on a later iteration
+                            pending_dirs.append((entry.path, current_depth + 1, item_info))
                         
                         items.append(item_info)
                         
-                    except (OSError, PermissionError):
+                    except OSError:
                         # Skip items we can't access
                         continue
-                        
-            except (OSError, PermissionError):
-                # Can't read directory
-                return None
+                
+                if parent_info is None:
+                    tree = items
+                elif items:
+                    parent_info['children'] = items
             
-            return items
+            return tree
         
         tree = scan_directory(folder_path)
         return jsonify({
@@ -518,12 +731,252 @@ def get_folder_settings():
         return jsonify({"success": False, "error": str(e)})
 
 # Import shared filtering utilities to ensure consistency
-from filtering_utils import is_hidden_path, matches_exclusion_patterns, filter_hidden_dirs
+from filtering_utils import is_hidden_path, matches_exclusion_patterns, filter_hidden_dirs, compile_exclusion_patterns
 
 # filter_hidden_dirs is now imported from filtering_utils.py
 
 # matches_exclusion_patterns is now imported from filtering_utils.py
 
+def _iter_tree(top, prune_dirs=None):
+    """
+    Top-down os.scandir walk yielding (root, relative_root, file_entries) per directory.
+    relative_root is '/'-separated and '.' for top. prune_dirs(root, relative_root, dirs)
+    may remove names from dirs in place to skip them, like editing dirs under os.walk.
+    DirEntry objects carry the type (and on Windows the stat) from the directory
+    listing, so classifying entries costs no extra syscalls.
+    """
+    stack = [top]
+    while stack:
+        root = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        
+        dirs = []
+        files = []
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    # Like os.walk, list symlinked dirs but never descend into them
+                    if not entry.is_symlink():
+                        dirs.append(entry.name)
+                else:
+                    files.append(entry)
+            except OSError:
+                continue
+        
+        relative_root = os.path.relpath(root, top).replace('\\', '/')
+        if prune_dirs is not None:
+            prune_dirs(root, relative_root, dirs)
+        
+        # Visit subdirectories depth-first in listing order, same as os.walk
+        stack.extend(os.path.join(root, d) for d in reversed(dirs))
+        
+        yield root, relative_root, files
+
+def _relative_child(relative_root, name):
+    """Relative path of `name` inside a directory yielded by _iter_tree"""
+    return name if relative_root == '.' else f"{relative_root}/{name}"
+
+def _walk_scandir(folder, custom_excludes=None, excluded=None):
+    """
+    Walk a folder with os.scandir, yielding (root, fname, stat_result) for indexable files.
+    Applies the same hidden/system/exclusion rules as the indexer and reuses the
+    DirEntry stat so callers don't need extra getsize/stat calls per file.
+    Pattern exclusions are tallied in the optional `excluded` Counter.
+    """
+    exclusions = compile_exclusion_patterns(custom_excludes) if custom_excludes else None
+    
+    def prune_dirs(root, relative_root, dirs):
+        # Filter out hidden directories to prevent descent
+        filter_hidden_dirs(dirs)
+        
+        # Filter out excluded directories at walk time for efficiency
+        if custom_excludes:
+            dirs_to_remove = []
+            for d in dirs:
+                # Create folder-relative path for pattern matching
+                relative_path = _relative_child(relative_root, d)
+                if exclusions.matches_entry(relative_path, d):
+                    dirs_to_remove.append(d)
+                    if excluded is not None:
+                        excluded["directories"] += 1
+                    logger.debug("Excluding directory: %s", relative_path)
+            
+            for excluded_dir in dirs_to_remove:
+                dirs.remove(excluded_dir)
+    
+    for root, relative_root, files in _iter_tree(folder, prune_dirs):
+        # Skip files in hidden directories
+        if SKIP_HIDDEN_FILES and is_hidden_path(root):
+            continue
+        
+        for entry in files:
+            fname = entry.name
+            
+            # Skip hidden files
+            if SKIP_HIDDEN_FILES and fname.startswith('.'):
+                continue
+            # Skip system files    
+            if SKIP_SYSTEM_FILES and fname.startswith('~'):
+                continue
+            
+            # Skip files matching custom exclusion patterns
+            if custom_excludes:
+                # Create folder-relative path for pattern matching
+                relative_path = _relative_child(relative_root, fname)
+                if exclusions.matches_entry(relative_path, fname):
+                    if excluded is not None:
+                        excluded["files"] += 1
+                    logger.debug("Excluding file due to pattern: %s", relative_path)
+                    continue
+            
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            yield root, fname, st
+
+def build_chunk_records(file_path, file_ext, chunking_mode, chunks):
+    """
+    Build the documents, metadatas and ids lists for one file's (chunk_text, line_nums)
+    chunks in a single pass; the per-file fields are shared via one base dict
+    """
+    base_meta = {
+        "path": file_path,
+        "fname": os.path.basename(file_path),
+        "file_type": file_ext,
+        "chunking_mode": chunking_mode,
+    }
+    id_prefix = f"{chunking_mode}-{file_path}-"
+    documents, metadatas, ids = [], [], []
+    for chunk_id, (chunk_text, line_ranges) in enumerate(chunks, 1):
+        documents.append(chunk_text)
+        metadatas.append({
+            **base_meta,
+            "chunk_id": chunk_id,
+            "chunk_index": chunk_id,  # For compatibility with gist_ranking
+            "line_ranges": encode_line_ranges(line_ranges),
+            "chunk_size": len(line_ranges),
+        })
+        ids.append(f"{id_prefix}{chunk_id}")
+    return documents, metadatas, ids
+
+def add_chunks_bisecting(collection, embeddings, documents, metadatas, ids, _retry=False):
+    """
+    Add one file's chunks with as few collection.add calls as possible. If a call
+    fails, its two halves are retried (as upserts, in case part of the failed call
+    landed), so a single bad chunk only loses itself. Returns the number of chunks added.
+    """
+    if len(ids) > CHROMA_MAX_BATCH_SIZE:
+        return sum(
+            add_chunks_bisecting(collection, embeddings[start:start + CHROMA_MAX_BATCH_SIZE],
+                                 documents[start:start + CHROMA_MAX_BATCH_SIZE],
+                                 metadatas[start:start + CHROMA_MAX_BATCH_SIZE],
+                                 ids[start:start + CHROMA_MAX_BATCH_SIZE], _retry)
+            for start in range(0, len(ids), CHROMA_MAX_BATCH_SIZE)
+        )
+    if not ids:
+        return 0
+    try:
+        write = collection.upsert if _retry else collection.add
+        write(embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids)
+        return len(ids)
+    except Exception as e:
+        if len(ids) == 1:
+            print(f"  Skipping chunk {ids[0]}: {e}")
+            return 0
+        mid = len(ids) // 2
+        return (add_chunks_bisecting(collection, embeddings[:mid], documents[:mid], metadatas[:mid], ids[:mid], True) +
+                add_chunks_bisecting(collection, embeddings[mid:], documents[mid:], metadatas[mid:], ids[mid:], True))
+
+class ChunkedInsert:
+    """
+    Buffers chunks (optionally from many files) and writes them to a collection
+    with a few large add() calls instead of one call per chunk.
+    on_flush(file_keys) is called with the files whose chunks were just written,
+    after each add() call that completes them.
+    """
+    
+    def __init__(self, collection, chunksize=INDEX_WRITE_BATCH_CHUNKS, on_flush=None):
+        self._add = collection.add
+        self._delete = collection.delete
+        self.chunksize = chunksize
+        self.on_flush = on_flush
+        self._embeddings, self._documents, self._metadatas, self._ids = [], [], [], []
+        self._file_keys = []
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def add(self, embeddings, documents, metadatas, ids, file_key=None):
+        """Queue one file's chunks; embeddings is an (N, D) array. Flushes once chunksize is reached."""
+        self._embeddings.append(np.asarray(embeddings, dtype=np.float32))
+        self._documents.extend(documents)
+        self._metadatas.extend(metadatas)
+        self._ids.extend(ids)
+        if file_key is not None:
+            # Remember where the file's chunks end in the buffer
+            self._file_keys.append((len(self._ids), file_key))
+        if len(self._ids) >= self.chunksize:
+            self.flush()
+    
+    def flush(self):
+        """Write everything buffered; the buffer is cleared even if the write fails"""
+        if not self._ids:
+            return
+        embeddings = np.concatenate(self._embeddings)
+        documents, metadatas, ids = self._documents, self._metadatas, self._ids
+        file_keys = self._file_keys
+        self._embeddings, self._documents, self._metadatas, self._ids = [], [], [], []
+        self._file_keys = []
+        
+        logger.debug("Adding %d chunks from %d files", len(ids), len(file_keys))
+        # Stay below Chroma's per-call batch limit; files are reported as soon as
+        # the call holding their last chunk succeeds, so a later failure can't
+        # leave written chunks that nothing tracks
+        reported_end = 0
+        next_key = 0
+        for start in range(0, len(ids), CHROMA_MAX_BATCH_SIZE):
+            end = start + CHROMA_MAX_BATCH_SIZE
+            try:
+                self._add(
+                    embeddings=embeddings[start:end],
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
+            except Exception:
+                # Remove chunks of files that were only partly written before this call
+                if start > reported_end:
+                    try:
+                        self._delete(ids=ids[reported_end:start])
+                    except Exception as e:
+                        print(f"Could not remove partially written chunks: {e}")
+                raise
+            
+            completed = []
+            while next_key < len(file_keys) and file_keys[next_key][0] <= end:
+                reported_end, file_key = file_keys[next_key]
+                completed.append(file_key)
+                next_key += 1
+            if self.on_flush and completed:
+                self.on_flush(completed)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+def make_extract_pool(max_workers, thread_name_prefix):
+    """Create the thread pool that runs extract_and_chunk / extract_chunks_for_update for one indexing or sync run"""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
 def index_folders_background(folders, chunking_mode='gist', custom_excludes=None, max_size_mb=None):
     """Background indexing function"""
     global indexing_status, granular_collection, filelevel_collection, gist_collection, gist_centroids_collection, pinpoint_collection
@@ -541,67 +994,26 @@ def index_folders_background(folders, chunking_mode='gist', custom_excludes=None
     try:
         # First, scan all folders for files
         all_files = []
-        print(f"DEBUG: Scanning folders: {folders}")
+        file_stats = {}  # path -> (mtime, size) captured during the scan
+        logger.debug("Scanning folders: %s", folders)
         for folder in folders:
-            print(f"DEBUG: Checking folder: {folder}, exists: {os.path.exists(folder)}")
-            if os.path.exists(folder):
+            folder_exists = os.path.exists(folder)
+            logger.debug("Checking folder: %s, exists: %s", folder, folder_exists)
+            if folder_exists:
                 # Skip if the root folder itself is hidden
                 if SKIP_HIDDEN_FILES and is_hidden_path(folder):
-                    print(f"DEBUG: Skipping hidden folder: {folder}")
+                    logger.debug("Skipping hidden folder: %s", folder)
                     continue
                     
-                for root, dirs, files in os.walk(folder):
-                    # Filter out hidden directories to prevent descent
-                    filter_hidden_dirs(dirs)
-                    
-                    # Filter out excluded directories at walk time for efficiency
-                    if custom_excludes:
-                        dirs_to_remove = []
-                        for d in dirs[:]:  # Create a copy to iterate over
-                            dir_path = os.path.join(root, d)
-                            # Create repository-relative path for pattern matching
-                            if folder in dir_path:
-                                relative_path = os.path.relpath(dir_path, folder).replace('\\', '/')
-                            else:
-                                relative_path = dir_path.replace('\\', '/')
-                                
-                            if matches_exclusion_patterns(relative_path, custom_excludes) or matches_exclusion_patterns(d, custom_excludes):
-                                dirs_to_remove.append(d)
-                                print(f"DEBUG: Excluding directory: {relative_path}")
-                        
-                        # Remove excluded directories from dirs list to prevent os.walk from descending
-                        for excluded_dir in dirs_to_remove:
-                            dirs.remove(excluded_dir)
-                    
-                    # Skip files in hidden directories
-                    if SKIP_HIDDEN_FILES and is_hidden_path(root):
-                        continue
-                    
-                    for fname in files:
-                        file_path = os.path.join(root, fname)
-                        
-                        # Skip hidden files
-                        if SKIP_HIDDEN_FILES and fname.startswith('.'):
-                            continue
-                        # Skip system files    
-                        if SKIP_SYSTEM_FILES and fname.startswith('~'):
-                            continue
-                        
-                        # Skip files matching custom exclusion patterns
-                        if custom_excludes:
-                            # Create repository-relative path for pattern matching
-                            if folder in file_path:
-                                relative_path = os.path.relpath(file_path, folder).replace('\\', '/')
-                            else:
-                                relative_path = file_path.replace('\\', '/')
-                                
-                            if matches_exclusion_patterns(relative_path, custom_excludes) or matches_exclusion_patterns(fname, custom_excludes):
-                                print(f"DEBUG: Excluding file due to pattern: {relative_path}")
-                                continue
-                            
-                        all_files.append((root, fname))
-        
-        print(f"DEBUG: Found {len(all_files)} total files to scan")
+                excluded = Counter()
+                for root, fname, st in _walk_scandir(folder, custom_excludes, excluded):
+                    all_files.append((root, fname))
+                    file_stats[os.path.join(root, fname)] = (st.st_mtime, st.st_size)
+                if excluded:
+                    logger.info("Excluded %d directories and %d files in %s by pattern",
+                                excluded["directories"], excluded["files"], folder)
+        
+        logger.debug("Found %d total files to scan", len(all_files))
         indexing_status.update({
             "total_files": len(all_files),
             "message": f"Found {len(all_files)} files to index in {chunking_mode} mode"
@@ -609,12 +1021,12 @@ def index_folders_background(folders, chunking_mode='gist', custom_excludes=None
         
         # Get file paths for metadata checking
         file_paths = [os.path.join(root, fname) for root, fname in all_files]
-        print(f"DEBUG: File paths to check: {file_paths[:5]}...")  # Show first 5 files
+        logger.debug("File paths to check: %s...", file_paths[:5])  # Show first 5 files
         
         # Check which files need indexing vs can be skipped
-        files_to_index, files_to_skip = metadata_tracker.get_files_to_index(file_paths, chunking_mode)
+        files_to_index, files_to_skip = metadata_tracker.get_files_to_index(file_paths, chunking_mode, file_stats)
         
-        print(f"DEBUG: Files to index: {len(files_to_index)}, Files to skip: {len(files_to_skip)}")
+        logger.debug("Files to index: %d, Files to skip: %d", len(files_to_index), len(files_to_skip))
         
         if files_to_skip:
             indexing_status.update({
@@ -622,7 +1034,7 @@ def index_folders_background(folders, chunking_mode='gist', custom_excludes=None
             })
         
         if not files_to_index:
-            print(f"DEBUG: No files to index - exiting early")
+            logger.debug("No files to index - exiting early")
             indexing_status.update({
                 "is_indexing": False,
                 "progress": 100,
@@ -655,100 +1067,122 @@ def index_folders_background(folders, chunking_mode='gist', custom_excludes=None
             chunking_function = create_large_chunks
             mode_description = "legacy (mixed chunks)"
         
-        # Process only files that need indexing
-        for file_idx, (root, fname) in enumerate(all_files):
-            # Check for cancellation
-            if indexing_status["cancel_requested"]:
-                print(f"Indexing cancelled at file {file_idx}/{len(all_files)}")
-                raise Exception("Indexing cancelled by user")
-            
-            fpath = os.path.join(root, fname)
-            
-            # Skip if file doesn't need indexing
-            if fpath not in files_to_index:
-                continue
+        # Select appropriate model batcher for the chunking mode; bind the hot
+        # methods once so the loops below don't re-resolve them per file
+        embedder = get_batcher_for_mode(chunking_mode)
+        submit_embeddings = embedder.submit
+        
+        def record_written_files(written_files):
+            """Update tracking once a file's chunks are actually in the collection"""
+            # Skip gist-mode centroid/metadata computation to keep gist indexing simple
+            # The sidecar is written once per flushed batch rather than once per file
+            metadata_tracker.begin_bulk()
+            try:
+                for fpath, num_chunks, chunk_sizes in written_files:
+                    # Update metadata for this file
+                    metadata_tracker.update_file_metadata(fpath, chunking_mode, num_chunks, chunk_sizes)
+                    
+                    # Track this file for potential rollback
+                    indexing_status["indexed_files_this_session"].append(fpath)
+            finally:
+                metadata_tracker.commit_bulk()
+        
+        # Chunks from several files are buffered and written with one add call;
+        # embeddings stay as (N, D) float32 arrays instead of boxed Python floats
+        writer = ChunkedInsert(target_collection, on_flush=record_written_files)
+        
+        def store_file_chunks(queued_file):
+            """Wait for a queued file's embeddings and buffer its chunks for writing"""
+            fpath, fname, file_ext, chunks, chunk_texts, embeddings_future = queued_file
+            _, metadatas, ids = build_chunk_records(fpath, file_ext, chunking_mode, chunks)
+            writer.add(
+                embeddings=embeddings_future.result(),
+                documents=chunk_texts,
+                metadatas=metadatas,
+                ids=ids,
+                file_key=(fpath, len(chunks), [len(line_ranges) for _, line_ranges in chunks])
+            )
+            return len(chunks)
+        
+        # Extraction and chunking run on a worker pool; a bounded look-ahead window
+        # keeps the embedder fed without holding every file's text in memory
+        extract_workers = EXTRACT_WORKERS or (os.cpu_count() or 1)
+        max_in_flight = 2 * extract_workers
+        extract_pool = make_extract_pool(extract_workers, "extract")
+        in_flight = deque()
+        previous_file = None
+        
+        def drain_extracted(limit):
+            """Queue extracted files for embedding until at most `limit` extractions are pending"""
+            nonlocal previous_file, chunks_created, files_indexed, skipped_files
+            while len(in_flight) > limit:
+                fpath, fname, file_ext, extract_future = in_flight.popleft()
+                chunks = extract_future.result()
+                if not chunks:
+                    skipped_files += 1
+                    continue
                 
-            file_ext = os.path.splitext(fname)[1].lower()
-            
-            # Update progress
-            indexing_status.update({
-                "progress": (file_idx / len(all_files)) * 100,
-                "current_file": fname,
-                "message": f"Indexing {fname} in {mode_description} mode..."
-            })
-            
-            # Note: Hidden/system files are already filtered during discovery
-            # This check is kept for backward compatibility and extra safety
-            if SKIP_HIDDEN_FILES and (fname.startswith('.') or is_hidden_path(fpath)):
-                skipped_files += 1
-                continue
-            if SKIP_SYSTEM_FILES and fname.startswith('~'):
-                skipped_files += 1
-                continue
-            
+                # Queue the chunks on the shared batcher; encoding of this file overlaps
+                # with extraction of the next ones and is merged with other pending files
+                chunk_texts = [chunk_text for chunk_text, _ in chunks]
+                pending_file = (fpath, fname, file_ext, chunks, chunk_texts, submit_embeddings(chunk_texts))
+                
+                # Store the previously queued file while this one is being encoded
+                if previous_file is not None:
+                    chunks_created += store_file_chunks(previous_file)
+                    files_indexed += 1
+                previous_file = pending_file
+        
+        try:
             # Check file size if limit is set (use custom limit or global limit)
             size_limit = max_size_mb if max_size_mb is not None else MAX_FILE_SIZE_MB
-            if size_limit > 0:
-                try:
-                    file_size_mb = os.path.getsize(fpath) / (1024 * 1024)
+            files_to_index = list(dict.fromkeys(files_to_index))  # overlapping folders may repeat paths
+            total_to_index = len(files_to_index)
+            
+            # Iterate only the files that need indexing; hidden/system files were
+            # already filtered out during discovery
+            for file_idx, fpath in enumerate(files_to_index):
+                # Check for cancellation
+                if indexing_status["cancel_requested"]:
+                    print(f"Indexing cancelled at file {file_idx}/{total_to_index}")
+                    raise Exception("Indexing cancelled by user")
+                
+                fname = os.path.basename(fpath)
+                file_ext = os.path.splitext(fname)[1].lower()
+                
+                # Update progress
+                indexing_status.update({
+                    "progress": (file_idx / total_to_index) * 100,
+                    "current_file": fname,
+                    "message": f"Indexing {fname} in {mode_description} mode..."
+                })
+                
+                if size_limit > 0:
+                    file_size_mb = file_stats[fpath][1] / (1024 * 1024)
                     if file_size_mb > size_limit:
                         skipped_files += 1
                         continue
-                except OSError:
-                    continue
-            
-            content = extract_text(fpath)
-            if not content.strip() or len(content.strip()) < MIN_CONTENT_LENGTH:
-                skipped_files += 1
-                continue
-            
-            # Create chunks using the selected chunking function
-            chunks = chunking_function(content, file_ext)
-            if not chunks:
-                skipped_files += 1
-                continue
-            
-            # Index chunks in the target collection
-            # Select appropriate model for the chunking mode
-            current_model = get_model_for_mode(chunking_mode)
-            
-            for chunk_idx, (chunk_text, line_ranges) in enumerate(chunks):
-                embedding = current_model.encode(chunk_text)
                 
-                unique_id = f"{chunking_mode}-{fpath}-{chunk_idx+1}"
-                print(f"DEBUG: Adding chunk with path: {fpath}")  # Debug path format
-                target_collection.add(
-                    embeddings=[embedding],
-                    documents=[chunk_text],
-                    metadatas=[{
-                        "path": fpath, 
-                        "fname": fname, 
-                        "file_type": file_ext,
-                        "chunk_id": chunk_idx + 1,
-                        "chunk_index": chunk_idx + 1,  # For compatibility with gist_ranking
-                        "line_ranges": str(line_ranges),
-                        "chunk_size": len(line_ranges),
-                        "chunking_mode": chunking_mode,
-                    }],
-                    ids=[unique_id]
-                )
-                chunks_created += 1
-            
-            # Skip gist-mode centroid/metadata computation to keep gist indexing simple
-            
-            # Update metadata for this file
-            chunk_sizes = [len(line_ranges) for _, line_ranges in chunks]
-            metadata_tracker.update_file_metadata(fpath, chunking_mode, len(chunks), chunk_sizes)
-            
-            # Track this file for potential rollback
-            indexing_status["indexed_files_this_session"].append(fpath)
+                in_flight.append((fpath, fname, file_ext,
+                                  extract_pool.submit(extract_and_chunk, fpath, file_ext, chunking_function)))
+                drain_extracted(max_in_flight)
             
+            drain_extracted(0)
+        finally:
+            extract_pool.shutdown(wait=False, cancel_futures=True)
+        
+        if previous_file is not None:
+            chunks_created += store_file_chunks(previous_file)
             files_indexed += 1
+            previous_file = None
+        
+        writer.flush()
         
         # Note: ChromaDB 1.0+ automatically persists data when using persist_directory
         print("+ ChromaDB data will be automatically persisted")
         
         # Update final status
+        indexing_status["embedding_cache"] = embedder.cache_stats()
         indexing_status.update({
             "is_indexing": False,
             "progress": 100,
@@ -831,29 +1265,22 @@ def cleanup_indexed_files_for_cancellation(file_paths, chunking_mode):
     removed_files = 0
     
     try:
-        for file_path in file_paths:
-            # Remove chunks from ChromaDB (works for both local and GitHub files)
-            try:
-                existing_results = collection.get(where={"path": file_path})
-                if existing_results and existing_results.get('ids'):
-                    chunk_ids = existing_results['ids']
-                    collection.delete(ids=chunk_ids)
-                    removed_chunks += len(chunk_ids)
-                    print(f"CLEANUP: Removed {len(chunk_ids)} chunks for {os.path.basename(file_path)}")
-            except Exception as e:
-                print(f"Error removing chunks for {os.path.basename(file_path)}: {e}")
-            
-            # Remove from metadata tracker (only for local files, GitHub files don't use metadata_tracker)
-            try:
-                # Check if this is a local file (not a GitHub repository path)
-                if not ('/.filesearcher/repos/' in file_path):
-                    metadata_tracker.remove_file_metadata(file_path)
-                    print(f"CLEANUP: Removed metadata for {os.path.basename(file_path)}")
-                else:
-                    print(f"CLEANUP: Skipped metadata removal for GitHub file: {os.path.basename(file_path)}")
-                removed_files += 1
-            except Exception as e:
-                print(f"Error removing metadata for {os.path.basename(file_path)}: {e}")
+        # Remove chunks from ChromaDB (works for both local and GitHub files)
+        try:
+            removed_chunks = delete_chunks_where_in(collection, "path", file_paths)
+        except Exception as e:
+            print(f"Error removing chunks for {len(file_paths)} files: {e}")
+        
+        # Remove from metadata tracker (only for local files, GitHub files don't use metadata_tracker)
+        try:
+            # Local files are the ones outside the GitHub repository clones
+            local_paths = [file_path for file_path in file_paths if '/.filesearcher/repos/' not in file_path]
+            metadata_tracker.remove_files_metadata(local_paths)
+            removed_files = len(file_paths)
+            print(f"CLEANUP: Removed metadata for {len(local_paths)} local files, "
+                  f"skipped {len(file_paths) - len(local_paths)} GitHub files")
+        except Exception as e:
+            print(f"Error removing metadata for {len(file_paths)} files: {e}")
         
         print(f"CLEANUP COMPLETE: Removed {removed_chunks} chunks and cleaned up {removed_files} files")
         return removed_files
@@ -862,18 +1289,91 @@ def cleanup_indexed_files_for_cancellation(file_paths, chunking_mode):
         print(f"Error during cleanup: {e}")
         return 0
 
-def delete_github_file_chunks(full_name, branch, file_path, chunking_mode):
+def delete_chunks_where_in(collection, field, values, where=None):
+    """
+    Delete every chunk whose metadata `field` is one of `values`, using one
+    $in query and one delete per CHROMA_MAX_BATCH_SIZE slice instead of a
+    get/delete round-trip per value. Returns the number of chunks deleted.
     """
-    Delete all chunks for a specific GitHub file
+    values = list(dict.fromkeys(values))
+    removed = 0
+    for start in range(0, len(values), CHROMA_MAX_BATCH_SIZE):
+        condition = {field: {"$in": values[start:start + CHROMA_MAX_BATCH_SIZE]}}
+        results = collection.get(
+            where={"$and": [*where, condition]} if where else condition,
+            include=[]
+        )
+        chunk_ids = results.get("ids") if results else None
+        if not chunk_ids:
+            continue
+        for id_start in range(0, len(chunk_ids), CHROMA_MAX_BATCH_SIZE):
+            collection.delete(ids=chunk_ids[id_start:id_start + CHROMA_MAX_BATCH_SIZE])
+        removed += len(chunk_ids)
+    return removed
+
+def _read_git_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+def get_head_sha(repo_path):
+    """
+    Get the commit SHA checked out in repo_path by reading .git/HEAD and the
+    ref it points to directly, without forking `git rev-parse HEAD`.
+    Falls back to git for layouts it doesn't understand; "unknown" on failure.
+    """
+    try:
+        git_dir = os.path.join(repo_path, '.git')
+        if os.path.isfile(git_dir):
+            # Worktree/submodule: .git is a file pointing at the real git dir
+            git_dir = _read_git_file(git_dir).split('gitdir:', 1)[1].strip()
+            git_dir = os.path.join(repo_path, git_dir)
+        
+        head = _read_git_file(os.path.join(git_dir, 'HEAD'))
+        if not head.startswith('ref:'):
+            return head  # Detached HEAD holds the SHA itself
+        
+        ref = head[4:].strip()
+        ref_path = os.path.join(git_dir, *ref.split('/'))
+        if os.path.isfile(ref_path):
+            return _read_git_file(ref_path)
+        
+        # Ref was packed by git gc
+        packed_refs = os.path.join(git_dir, 'packed-refs')
+        if os.path.isfile(packed_refs):
+            with open(packed_refs, 'r', encoding='utf-8') as f:
+                for line in f:
+                    sha, _, name = line.strip().partition(' ')
+                    if name == ref:
+                        return sha
+    except (OSError, IndexError):
+        pass
+    
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=repo_path,
+            text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+def delete_github_file_chunks(full_name, branch, file_paths, chunking_mode):
+    """
+    Delete all chunks for one or more GitHub files
     
     Args:
         full_name: GitHub repo full name (owner/repo)
         branch: Branch name
-        file_path: Relative path of the file in the repo
+        file_paths: Relative path of the file in the repo, or a list of them
         chunking_mode: 'gist' or 'pinpoint'
     """
     global gist_collection, pinpoint_collection
     
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    if not file_paths:
+        return
+    
     try:
         # Select the appropriate collection
         if chunking_mode == 'gist':
@@ -883,27 +1383,54 @@ def delete_github_file_chunks(full_name, branch, file_path, chunking_mode):
         else:
             return
         
-        # Find all chunks with this file path
+        # Find all chunks of these files on this repo/branch and delete them
         # The ID pattern is: gh://owner/repo@branch:relative/path-chunk_idx
-        id_prefix = f"gh://{full_name}@{branch}:{file_path}"
-        
-        # Get all IDs that match this prefix
-        results = collection.get(
-            where={"$and": [
-                {"source": "github"},
-                {"repo": full_name},
-                {"branch": branch},
-                {"file_path": file_path}
-            ]}
+        deleted = delete_chunks_where_in(
+            collection, "file_path", file_paths,
+            where=[{"source": "github"}, {"repo": full_name}, {"branch": branch}]
         )
         
-        if results and results.get("ids"):
-            # Delete all matching chunks
-            collection.delete(ids=results["ids"])
-            print(f"Deleted {len(results['ids'])} chunks for {file_path} in {chunking_mode} mode")
+        if deleted:
+            print(f"Deleted {deleted} chunks for {len(file_paths)} files in {chunking_mode} mode")
     
     except Exception as e:
-        print(f"ERROR: Failed to delete chunks for {file_path}: {e}")
+        print(f"ERROR: Failed to delete chunks for {len(file_paths)} files: {e}")
+
+def build_github_chunk_records(chunks, full_name, branch, relative_path, full_path, fname, file_ext,
+                               commit_sha, timestamp, chunking_mode):
+    """
+    Build the (metadatas, ids) lists for one GitHub file's chunks.
+    The per-file fields are assembled once and only the chunk fields vary.
+    """
+    base_meta = {
+        # GitHub-specific fields
+        "source": "github",
+        "repo": full_name,
+        "branch": branch,
+        "file_path": relative_path,
+        "commit_sha": commit_sha,
+        "last_indexed_at": timestamp,
+        
+        # Standard fields (for compatibility)
+        "path": full_path,
+        "fname": fname,
+        "file_type": file_ext,
+        "chunking_mode": chunking_mode,
+    }
+    # GitHub-specific doc_id format: gh://owner/repo@branch:relative/path-chunk_idx
+    id_prefix = f"gh://{full_name}@{branch}:{relative_path}-"
+    
+    metadatas = []
+    ids = []
+    for chunk_number, (_, line_ranges) in enumerate(chunks, 1):
+        meta = base_meta.copy()
+        meta["chunk_id"] = chunk_number
+        meta["chunk_index"] = chunk_number
+        meta["line_ranges"] = encode_line_ranges(line_ranges)
+        meta["chunk_size"] = len(line_ranges)
+        metadatas.append(meta)
+        ids.append(id_prefix + str(chunk_number))
+    return metadatas, ids
 
 def index_github_files(repo_path, full_name, branch, file_list, chunking_mode='gist', custom_excludes=None, max_size_mb=None):
     """
@@ -920,19 +1447,8 @@ def index_github_files(repo_path, full_name, branch, file_list, chunking_mode='g
     """
     global gist_collection, pinpoint_collection
     
-    import subprocess
-    import time
-    import os
-    
     # Get current commit SHA
-    try:
-        commit_sha = subprocess.check_output(
-            ['git', 'rev-parse', 'HEAD'],
-            cwd=repo_path,
-            text=True
-        ).strip()
-    except:
-        commit_sha = "unknown"
+    commit_sha = get_head_sha(repo_path)
     
     # Select the appropriate collection and chunking function
     if chunking_mode == 'gist':
@@ -948,29 +1464,35 @@ def index_github_files(repo_path, full_name, branch, file_list, chunking_mode='g
     files_indexed = 0
     chunks_created = 0
     
-    # Get the appropriate model
-    current_model = get_model_for_mode(chunking_mode)
+    # Shared batcher for the mode's model; one encode request per file
+    embedder = get_batcher_for_mode(chunking_mode)
+    
+    def record_written_files(written_files):
+        nonlocal files_indexed, chunks_created
+        for num_chunks in written_files:
+            files_indexed += 1
+            chunks_created += num_chunks
+    
+    writer = ChunkedInsert(target_collection, on_flush=record_written_files)
+    exclusions = compile_exclusion_patterns(custom_excludes)
     
     for relative_path in file_list:
         full_path = os.path.join(repo_path, relative_path)
         
-        # Skip if file doesn't exist
-        if not os.path.exists(full_path):
+        # Skip if excluded
+        if custom_excludes and exclusions.matches(relative_path):
             continue
         
-        # Skip if excluded
-        if custom_excludes and matches_exclusion_patterns(relative_path, custom_excludes):
+        # One stat covers both the existence and the size check
+        try:
+            st = os.stat(full_path)
+        except OSError:
             continue
         
         # Check file size
         size_limit = max_size_mb if max_size_mb is not None else MAX_FILE_SIZE_MB
-        if size_limit > 0:
-            try:
-                file_size_mb = os.path.getsize(full_path) / (1024 * 1024)
-                if file_size_mb > size_limit:
-                    continue
-            except:
-                continue
+        if size_limit > 0 and st.st_size > size_limit * 1024 * 1024:
+            continue
         
         # Extract text content
         content = extract_text(full_path)
@@ -985,42 +1507,133 @@ def index_github_files(repo_path, full_name, branch, file_list, chunking_mode='g
         if not chunks:
             continue
         
+        # Encode all of the file's chunks in one batched call
+        documents = [chunk_text for chunk_text, _ in chunks]
+        try:
+            embeddings = embedder.encode(documents)
+        except Exception as e:
+            print(f"ERROR GITHUB: Failed to encode chunks for {relative_path}: {e}")
+            continue
+        
         # Index chunks with GitHub-specific metadata
-        for chunk_idx, (chunk_text, line_ranges) in enumerate(chunks):
-            embedding = current_model.encode(chunk_text)
+        metadatas, ids = build_github_chunk_records(
+            chunks, full_name, branch, relative_path, full_path, fname, file_ext,
+            commit_sha, current_timestamp, chunking_mode
+        )
+        
+        try:
+            writer.add(embeddings, documents, metadatas, ids, file_key=len(chunks))
+        except Exception as e:
+            print(f"ERROR GITHUB: Failed to add chunks for {relative_path}: {e}")
+    
+    try:
+        writer.flush()
+    except Exception as e:
+        print(f"ERROR GITHUB: Failed to add buffered chunks: {e}")
+    
+    print(f"Indexed {files_indexed} files, {chunks_created} chunks for sync")
+
+def _iter_candidate_files(repo_path, custom_excludes=None):
+    """
+    Walk a GitHub clone with os.scandir and yield (full_path, relative_path, fname, file_size)
+    for every file that passes the hidden/system/exclusion rules, in os.walk order.
+    The size comes from the directory listing's cached stat, so no extra syscalls are needed.
+    """
+    if not os.path.exists(repo_path):
+        return
+    
+    logger.debug("Scanning GitHub repo %s (SKIP_HIDDEN_FILES=%s, custom_excludes=%s)",
+                 repo_path, SKIP_HIDDEN_FILES, custom_excludes)
+    
+    # Compile the exclusion patterns once for the whole walk
+    exclusions = compile_exclusion_patterns(custom_excludes)
+    found = 0
+    
+    def prune_dirs(root, relative_root, dirs):
+        # Filter out hidden directories
+        filter_hidden_dirs(dirs)
+        
+        # Filter out excluded directories
+        if custom_excludes:
+            dirs_to_remove = []
+            for d in dirs:
+                relative_dir_path = _relative_child(relative_root, d)
+                if exclusions.matches_entry(relative_dir_path, d):
+                    dirs_to_remove.append(d)
+                    logger.debug("Excluding directory: %s", relative_dir_path)
             
-            # GitHub-specific doc_id format
-            unique_id = f"gh://{full_name}@{branch}:{relative_path}-{chunk_idx+1}"
+            for excluded_dir in dirs_to_remove:
+                dirs.remove(excluded_dir)
+    
+    for root, relative_root, files in _iter_tree(repo_path, prune_dirs):
+        # Skip hidden directories (but not the root repo directory itself)
+        if SKIP_HIDDEN_FILES and relative_root != '.':
+            if is_hidden_path(relative_root):
+                logger.debug("Skipping hidden directory: %s", relative_root)
+                continue
+        
+        for entry in files:
+            fname = entry.name
             
-            # GitHub-specific metadata
-            metadata = {
-                "source": "github",
-                "repo": full_name,
-                "branch": branch,
-                "file_path": relative_path,
-                "commit_sha": commit_sha,
-                "last_indexed_at": current_timestamp,
-                "path": full_path,
-                "fname": fname,
-                "file_type": file_ext,
-                "chunk_id": chunk_idx + 1,
-                "chunk_index": chunk_idx + 1,
-                "line_ranges": str(line_ranges),
-                "chunk_size": len(line_ranges),
-                "chunking_mode": chunking_mode,
-            }
+            # Skip hidden files
+            if SKIP_HIDDEN_FILES and fname.startswith('.'):
+                continue
+            # Skip system files
+            if SKIP_SYSTEM_FILES and fname.startswith('~'):
+                continue
             
-            target_collection.add(
-                embeddings=[embedding],
-                documents=[chunk_text],
-                metadatas=[metadata],
-                ids=[unique_id]
-            )
-            chunks_created += 1
-        
-        files_indexed += 1
+            # Relative paths are only built for files that survive the name checks
+            relative_file_path = _relative_child(relative_root, fname)
+            
+            # Skip files matching exclusion patterns
+            if custom_excludes and exclusions.matches_entry(relative_file_path, fname):
+                logger.debug("Excluding file by pattern: %s", relative_file_path)
+                continue
+            
+            try:
+                file_size = entry.stat().st_size
+            except OSError:
+                logger.debug("Error getting file size for %s", relative_file_path)
+                continue
+            
+            found += 1
+            yield entry.path, relative_file_path, fname, file_size
     
-    print(f"Indexed {files_indexed} files, {chunks_created} chunks for sync")
+    logger.debug("Found %d files in GitHub repo %s", found, repo_path)
+
+_SCAN_DONE = object()
+
+def _iter_in_background(iterable, on_item=None, name="scan"):
+    """
+    Run an iterator on a daemon thread and yield its items as they arrive, so a
+    slow producer (directory walk) overlaps with the consumer. on_item is called
+    on the producer thread for each item; producer errors are re-raised here.
+    """
+    items = queue.Queue()
+    stop = threading.Event()
+    
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    break
+                if on_item is not None:
+                    on_item(item)
+                items.put(item)
+        except BaseException as e:
+            items.put(e)
+        finally:
+            items.put(_SCAN_DONE)
+    
+    threading.Thread(target=produce, name=name, daemon=True).start()
+    try:
+        for item in iter(items.get, _SCAN_DONE):
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Stop the producer early if the consumer bailed out (e.g. cancellation)
+        stop.set()
 
 def index_github_repository(repo_path, full_name, branch, chunking_mode='gist', custom_excludes=None, max_size_mb=None):
     """
@@ -1036,18 +1649,8 @@ def index_github_repository(repo_path, full_name, branch, chunking_mode='gist',
     """
     global indexing_status, gist_collection, pinpoint_collection
     
-    import subprocess
-    import time
-    
     # Get current commit SHA
-    try:
-        commit_sha = subprocess.check_output(
-            ['git', 'rev-parse', 'HEAD'],
-            cwd=repo_path,
-            text=True
-        ).strip()
-    except:
-        commit_sha = "unknown"
+    commit_sha = get_head_sha(repo_path)
     
     indexing_status.update({
         "is_indexing": True,
@@ -1060,100 +1663,19 @@ def index_github_repository(repo_path, full_name, branch, chunking_mode='gist',
     })
     
     try:
-        # Scan repository for files
-        all_files = []
-        print(f"DEBUG GITHUB: Scanning GitHub repo: {repo_path}")
-        print(f"DEBUG GITHUB: Repo exists: {os.path.exists(repo_path)}")
-        
-        if os.path.exists(repo_path):
-            print(f"DEBUG GITHUB: Starting os.walk on {repo_path}")
-            print(f"DEBUG GITHUB: SKIP_HIDDEN_FILES = {SKIP_HIDDEN_FILES}")
-            print(f"DEBUG GITHUB: custom_excludes = {custom_excludes}")
-            
-            for root, dirs, files in os.walk(repo_path):
-                relative_root = os.path.relpath(root, repo_path).replace('\\', '/')
-                print(f"DEBUG GITHUB: Walking {relative_root} (abs: {root})")
-                print(f"DEBUG GITHUB: - Found {len(dirs)} directories: {dirs}")
-                print(f"DEBUG GITHUB: - Found {len(files)} files: {files[:10]}{'...' if len(files) > 10 else ''}")
-                
-                # Store original dirs for comparison
-                original_dirs = dirs.copy()
-                
-                # Filter out hidden directories
-                filter_hidden_dirs(dirs)
-                if len(dirs) != len(original_dirs):
-                    removed_hidden = set(original_dirs) - set(dirs)
-                    print(f"DEBUG GITHUB: Filtered out hidden dirs: {removed_hidden}")
-                
-                # Filter out excluded directories
-                if custom_excludes:
-                    dirs_before_exclusion = dirs.copy()
-                    dirs_to_remove = []
-                    for d in dirs[:]:
-                        dir_path = os.path.join(root, d)
-                        relative_dir_path = os.path.relpath(dir_path, repo_path).replace('\\', '/')
-                        
-                        if matches_exclusion_patterns(relative_dir_path, custom_excludes) or matches_exclusion_patterns(d, custom_excludes):
-                            dirs_to_remove.append(d)
-                            print(f"DEBUG GITHUB: Excluding directory: {relative_dir_path}")
-                    
-                    for excluded_dir in dirs_to_remove:
-                        dirs.remove(excluded_dir)
-                    
-                    if len(dirs) != len(dirs_before_exclusion):
-                        removed_excluded = set(dirs_before_exclusion) - set(dirs)
-                        print(f"DEBUG GITHUB: Excluded dirs: {removed_excluded}")
-                
-                print(f"DEBUG GITHUB: Final dirs to traverse: {dirs}")
-                
-                # Skip hidden directories (but not the root repo directory itself)
-                if SKIP_HIDDEN_FILES and root != repo_path:
-                    if is_hidden_path(relative_root):
-                        print(f"DEBUG GITHUB: Skipping hidden directory: {relative_root}")
-                        continue
-                
-                print(f"DEBUG GITHUB: working on {len(files)} files in {relative_root}")
-                for fname in files:
-                    file_path = os.path.join(root, fname)
-                    relative_file_path = os.path.relpath(file_path, repo_path).replace('\\', '/')
-                    
-                    # Debug each file decision
-                    reasons_skipped = []
-                    
-                    # Skip hidden files
-                    if SKIP_HIDDEN_FILES and fname.startswith('.'):
-                        reasons_skipped.append("hidden file")
-                        continue
-                    # Skip system files
-                    if SKIP_SYSTEM_FILES and fname.startswith('~'):
-                        reasons_skipped.append("system file")
-                        continue
-                    
-                    # Skip files matching exclusion patterns
-                    if custom_excludes:
-                        if matches_exclusion_patterns(relative_file_path, custom_excludes):
-                            reasons_skipped.append(f"excluded by path pattern")
-                            print(f"DEBUG GITHUB: Excluding file by path pattern: {relative_file_path}")
-                            continue
-                        if matches_exclusion_patterns(fname, custom_excludes):
-                            reasons_skipped.append(f"excluded by filename pattern")
-                            print(f"DEBUG GITHUB: Excluding file by filename pattern: {fname} in {relative_file_path}")
-                            continue
-                    
-                    all_files.append((file_path, relative_file_path, fname))
-                    if len(all_files) <= 10:  # Log first 10 files with their paths
-                        print(f"DEBUG GITHUB: Added file #{len(all_files)}: {relative_file_path}")
-                    
-                print(f"DEBUG GITHUB: Completed directory {relative_root}, total files so far: {len(all_files)}")
-        else:
+        if not os.path.exists(repo_path):
             print(f"ERROR GITHUB: Repository path does not exist: {repo_path}")
         
-        print(f"DEBUG: Found {len(all_files)} files in GitHub repo")
+        # Discover files on a background thread while earlier files are being
+        # indexed; total_files grows as the scan proceeds
+        def count_discovered(_):
+            indexing_status["total_files"] += 1
         
-        indexing_status.update({
-            "total_files": len(all_files),
-            "message": f"indexing {len(all_files)} files from {full_name} in {chunking_mode} mode"
-        })
+        candidate_files = _iter_in_background(
+            _iter_candidate_files(repo_path, custom_excludes),
+            on_item=count_discovered,
+            name="gh-scan"
+        )
         
         # Select the appropriate collection and chunking function
         if chunking_mode == 'gist':
@@ -1176,118 +1698,118 @@ def index_github_repository(repo_path, full_name, branch, chunking_mode='gist',
         current_timestamp = int(time.time())
         actually_indexed_files = []  # Track files that were actually processed
         
-        # Process each file
-        for file_idx, (full_path, relative_path, fname) in enumerate(all_files):
-            # Check for cancellation
-            if indexing_status["cancel_requested"]:
-                print(f"GitHub indexing cancelled at file {file_idx}/{len(all_files)}")
-                raise Exception("Indexing cancelled by user")
-            
-            file_ext = os.path.splitext(fname)[1].lower()
-            
-            print(f"DEBUG GITHUB: file {file_idx+1}/{len(all_files)}: {relative_path}")
-            
-            # Update progress
-            indexing_status.update({
-                "progress": (file_idx / len(all_files)) * 100,
-                "current_file": relative_path,
-                "message": f"Indexing {relative_path} from {full_name} in {mode_description} mode..."
-            })
-            
-            # Check file size
-            size_limit = max_size_mb if max_size_mb is not None else MAX_FILE_SIZE_MB
-            if size_limit > 0:
-                try:
-                    file_size_mb = os.path.getsize(full_path) / (1024 * 1024)
-                    if file_size_mb > size_limit:
-                        print(f"DEBUG GITHUB: Skipping large file: {relative_path} ({file_size_mb:.2f}MB)")
-                        skipped_files += 1
-                        continue
-                except OSError:
-                    print(f"DEBUG GITHUB: Error getting file size for {relative_path}")
-                    continue
-            
-            # Extract text content
-            print(f"DEBUG GITHUB: Extracting text from {relative_path}")
-            content = extract_text(full_path)
-            if not content.strip() or len(content.strip()) < MIN_CONTENT_LENGTH:
-                print(f"DEBUG GITHUB: Skipping file with no/little content: {relative_path}")
-                skipped_files += 1
-                continue
-            
-            print(f"DEBUG GITHUB: Extracted {len(content)} chars from {relative_path}")
-            
-            # Create chunks
-            print(f"DEBUG GITHUB: Creating chunks with {chunking_function.__name__} for {relative_path}")
-            chunks = chunking_function(content, file_ext)
+        def record_written_files(written_files):
+            nonlocal files_indexed, chunks_created
+            for relative_path, full_path, num_chunks in written_files:
+                files_indexed += 1
+                chunks_created += num_chunks
+                actually_indexed_files.append(relative_path)  # Track this file as successfully indexed
+                
+                # Also track for potential rollback (use full path for GitHub files)
+                indexing_status["indexed_files_this_session"].append(full_path)
+        
+        # Resolve the mode's model/batcher once for the whole repository
+        embedder = get_batcher_for_mode(chunking_mode)
+        
+        # Chunks are written in multi-file batches rather than one add() per chunk
+        writer = ChunkedInsert(target_collection, on_flush=record_written_files)
+        
+        def index_extracted_file(full_path, relative_path, fname, file_ext, chunks):
+            """Embed an extracted file's chunks and buffer them with GitHub-specific metadata"""
+            nonlocal skipped_files
             if not chunks:
-                print(f"DEBUG GITHUB: No chunks created for {relative_path}")
+                logger.debug("Skipping file with no/little content: %s", relative_path)
                 skipped_files += 1
-                continue
+                return
             
-            print(f"DEBUG GITHUB: Created {len(chunks)} chunks for {relative_path}")
+            logger.debug("Created %d chunks for %s", len(chunks), relative_path)
             
-            # Get the appropriate model
-            current_model = get_model_for_mode(chunking_mode)
-            print(f"DEBUG GITHUB: Using model: {current_model}")
+            # Encode all of the file's chunks in one batched call
+            documents = [chunk_text for chunk_text, _ in chunks]
+            try:
+                embeddings = embedder.encode(documents)
+            except Exception as e:
+                print(f"ERROR GITHUB: Failed to encode chunks for {relative_path}: {e}")
+                return
             
             # Index chunks with GitHub-specific metadata
-            for chunk_idx, (chunk_text, line_ranges) in enumerate(chunks):
-                try:
-                    print(f"DEBUG GITHUB: chunk {chunk_idx+1}/{len(chunks)} for {relative_path}")
-                    
-                    embedding = current_model.encode(chunk_text)
-                    print(f"DEBUG GITHUB: Generated embedding of shape {embedding.shape if hasattr(embedding, 'shape') else 'unknown'}")
-                    
-                    # GitHub-specific doc_id format: gh://owner/repo@branch:relative/path-chunk_idx
-                    unique_id = f"gh://{full_name}@{branch}:{relative_path}-{chunk_idx+1}"
-                    
-                    # GitHub-specific metadata
-                    metadata = {
-                        # GitHub-specific fields
-                        "source": "github",
-                        "repo": full_name,
-                        "branch": branch,
-                        "file_path": relative_path,
-                        "commit_sha": commit_sha,
-                        "last_indexed_at": current_timestamp,
-                        
-                        # Standard fields (for compatibility)
-                        "path": full_path,
-                        "fname": fname,
-                        "file_type": file_ext,
-                        "chunk_id": chunk_idx + 1,
-                        "chunk_index": chunk_idx + 1,
-                        "line_ranges": str(line_ranges),
-                        "chunk_size": len(line_ranges),
-                        "chunking_mode": chunking_mode
-                    }
-                    
-                    print(f"DEBUG GITHUB: Adding chunk {unique_id} to collection {target_collection}")
-                    print(f"DEBUG GITHUB: Metadata: source={metadata['source']}, repo={metadata['repo']}, branch={metadata['branch']}")
-                    
-                    target_collection.add(
-                        embeddings=[embedding],
-                        documents=[chunk_text],
-                        metadatas=[metadata],
-                        ids=[unique_id]
-                    )
-                    chunks_created += 1
-                    print(f"DEBUG GITHUB: added chunk {unique_id}")
-                    
-                except Exception as e:
-                    print(f"ERROR GITHUB: Failed to add chunk {chunk_idx+1} for {relative_path}: {e}")
-                    import traceback
-                    traceback.print_exc()
-            
-            files_indexed += 1
-            actually_indexed_files.append(relative_path)  # Track this file as successfully indexed
+            metadatas, ids = build_github_chunk_records(
+                chunks, full_name, branch, relative_path, full_path, fname, file_ext,
+                commit_sha, current_timestamp, chunking_mode
+            )
             
-            # Also track for potential rollback (use full path for GitHub files)
-            github_full_path = full_path  # This is the actual file path we index
-            indexing_status["indexed_files_this_session"].append(github_full_path)
+            try:
+                writer.add(embeddings, documents, metadatas, ids,
+                           file_key=(relative_path, full_path, len(chunks)))
+            except Exception as e:
+                print(f"ERROR GITHUB: Failed to add chunks for {relative_path}: {e}")
+        
+        # Text extraction runs ahead of embedding on a worker pool; the pool is only
+        # started once the repo has more than EXTRACT_PARALLEL_MIN_FILES files, so
+        # small repos are extracted inline and don't pay its start-up cost
+        extract_workers = EXTRACT_WORKERS or (os.cpu_count() or 1)
+        extract_pool = None
+        max_in_flight = 2 * extract_workers
+        in_flight = deque()
+        
+        def drain_extracted(limit):
+            """Index extracted files in order until at most `limit` extractions are pending"""
+            while len(in_flight) > limit:
+                file_entry, extract_future = in_flight.popleft()
+                index_extracted_file(*file_entry, extract_future.result())
+        
+        try:
+            # Process each file
+            size_limit = max_size_mb if max_size_mb is not None else MAX_FILE_SIZE_MB
+            status_message = f"Indexing {{}} from {full_name} in {mode_description} mode..."
+            last_status_update = float('-inf')
+            for file_idx, (full_path, relative_path, fname, file_size) in enumerate(candidate_files):
+                # Check for cancellation
+                if indexing_status["cancel_requested"]:
+                    print(f"GitHub indexing cancelled at file {file_idx}/{indexing_status['total_files']}")
+                    raise Exception("Indexing cancelled by user")
+                
+                if extract_pool is None and file_idx >= EXTRACT_PARALLEL_MIN_FILES:
+                    extract_pool = make_extract_pool(extract_workers, "gh-extract")
+                
+                file_ext = os.path.splitext(fname)[1].lower()
+                
+                # Update progress, throttled: the UI polls about once a second
+                now = time.monotonic()
+                if now - last_status_update >= STATUS_UPDATE_INTERVAL:
+                    last_status_update = now
+                    indexing_status.update({
+                        "progress": (file_idx / max(indexing_status["total_files"], 1)) * 100,
+                        "current_file": relative_path,
+                        "message": status_message.format(relative_path)
+                    })
+                
+                # Check file size (from the scan, no extra stat)
+                if size_limit > 0:
+                    file_size_mb = file_size / (1024 * 1024)
+                    if file_size_mb > size_limit:
+                        logger.debug("Skipping large file: %s (%.2fMB)", relative_path, file_size_mb)
+                        skipped_files += 1
+                        continue
+                
+                # Extract text content and create chunks
+                file_entry = (full_path, relative_path, fname, file_ext)
+                if extract_pool is None:
+                    index_extracted_file(*file_entry, extract_and_chunk(full_path, file_ext, chunking_function))
+                    continue
+                
+                in_flight.append((file_entry, extract_pool.submit(extract_and_chunk, full_path, file_ext, chunking_function)))
+                drain_extracted(max_in_flight)
             
-            print(f"DEBUG GITHUB: Completed file {relative_path} - {len(chunks)} chunks")
+            drain_extracted(0)
+        finally:
+            if extract_pool is not None:
+                extract_pool.shutdown(wait=False, cancel_futures=True)
+        
+        try:
+            writer.flush()
+        except Exception as e:
+            print(f"ERROR GITHUB: Failed to add buffered chunks: {e}")
         
         # Update final status
         indexing_status.update({
@@ -1320,7 +1842,6 @@ def index_github_repository(repo_path, full_name, branch, chunking_mode='gist',
     except Exception as e:
         error_msg = f"GitHub indexing failed: {str(e)}"
         print(f"ERROR: {error_msg}")
-        import traceback
         traceback.print_exc()
         
         indexing_status.update({
@@ -1334,18 +1855,37 @@ def index_github_repository(repo_path, full_name, branch, chunking_mode='gist',
             "error": error_msg
         }
 
-def compute_enhanced_pinpoint_confidence(query: str, chunk_content: str, file_path: str, raw_distance: float) -> float:
+def compute_pinpoint_base_semantic_batch(raw_distances) -> np.ndarray:
+    """
+    Pinpoint base semantic score for a whole array of query distances at once.
+    Same piecewise-linear mapping as the scalar branch in compute_enhanced_pinpoint_confidence.
+    """
+    d = np.asarray(raw_distances, dtype=np.float64)
+    return np.select(
+        [d <= 0.3, d <= 0.6, d <= 1.0, d <= 1.4],
+        [
+            1.0 - (d / 0.3) * 0.1,                # 0.9-1.0 range
+            0.9 - ((d - 0.3) / 0.3) * 0.2,        # 0.7-0.9 range
+            0.7 - ((d - 0.6) / 0.4) * 0.3,        # 0.4-0.7 range
+            0.4 - ((d - 1.0) / 0.4) * 0.25,       # 0.15-0.4 range
+        ],
+        default=np.maximum(0.0, 0.15 - ((d - 1.4) / 1.0) * 0.15)  # 0-0.15 range
+    )
+
+def compute_enhanced_pinpoint_confidence(query: str, chunk_content: str, file_path: str, raw_distance: float,
+                                         query_lower: str = None, base_semantic: float = None) -> float:
     """
     Pinpoint-specific confidence calculation optimized for exact phrase matching
     and line-level precision. Adapts the gist approach for smaller chunks.
+    Callers scoring many chunks for one query can pass the precomputed query_lower
+    and the base_semantic score from compute_pinpoint_base_semantic_batch.
     """
-    import re
-    import os
-    
     # Step 1: PINPOINT-OPTIMIZED BASE SCORE
     # AllMiniLM distances typically range differently than MSMarco
     # More aggressive scoring for exact matches due to smaller chunks
-    if raw_distance <= 0.3:  # Tighter threshold for pinpoint
+    if base_semantic is not None:
+        pass  # Precomputed by compute_pinpoint_base_semantic_batch
+    elif raw_distance <= 0.3:  # Tighter threshold for pinpoint
         base_semantic = 1.0 - (raw_distance / 0.3) * 0.1  # 0.9-1.0 range
     elif raw_distance <= 0.6:
         base_semantic = 0.9 - ((raw_distance - 0.3) / 0.3) * 0.2  # 0.7-0.9 range
@@ -1357,17 +1897,21 @@ def compute_enhanced_pinpoint_confidence(query: str, chunk_content: str, file_pa
         base_semantic = max(0.0, 0.15 - ((raw_distance - 1.4) / 1.0) * 0.15)  # 0-0.15 range
     
     # Step 2: EXACT PHRASE MATCHING BOOST (crucial for pinpoint)
-    query_lower = query.lower()
+    if query_lower is None:
+        query_lower = query.lower()
     content_lower = chunk_content.lower()
     
+    # One scan of the chunk serves both the exact-match and the position checks
+    position = content_lower.find(query_lower)
+    
     exact_boost = 1.0
-    if query_lower in content_lower:
+    if position >= 0:
         # Stronger boost for exact phrase matches in small chunks
         exact_boost = 1.5  # 50% boost for exact phrase presence
     else:
         # Check for partial word matches
-        query_words = re.findall(r'\b\w+\b', query_lower)
-        content_words = set(re.findall(r'\b\w+\b', content_lower))
+        query_words = _WORD_RE.findall(query_lower)
+        content_words = set(_WORD_RE.findall(content_lower))
         matches = sum(1 for word in query_words if word in content_words)
         if matches > 0:
             exact_boost = 1.0 + (matches / len(query_words)) * 0.3  # Up to 30% boost
@@ -1381,8 +1925,7 @@ def compute_enhanced_pinpoint_confidence(query: str, chunk_content: str, file_pa
     # Step 4: POSITION-BASED SCORING (unique to pinpoint)
     # Prefer matches at the beginning of chunks (more likely to be important)
     position_boost = 1.0
-    if query_lower in content_lower:
-        position = content_lower.find(query_lower)
+    if position >= 0:
         relative_position = position / len(content_lower)
         if relative_position < 0.2:  # In first 20% of chunk
             position_boost = 1.15
@@ -1399,33 +1942,44 @@ def compute_enhanced_pinpoint_confidence(query: str, chunk_content: str, file_pa
     
     return max(0.0, min(1.0, final_confidence))
 
-def aggregate_pinpoint_chunks_for_file(chunks_with_confidence, query: str) -> float:
+def aggregate_pinpoint_chunks_for_file(chunks_with_confidence, query: str, query_lower: str = None,
+                                       exact_matches: int = None) -> float:
     """
     Aggregate multiple pinpoint chunks for a file into a single confidence score.
     Optimized for pinpoint's small chunk characteristics.
+    Callers that already counted the chunks containing the query can pass exact_matches.
     """
     if not chunks_with_confidence:
         return 0.0
     
-    # Sort by confidence
-    sorted_chunks = sorted(chunks_with_confidence, key=lambda x: x['confidence'], reverse=True)
+    if query_lower is None:
+        query_lower = query.lower()
     
-    # Primary score from best chunk
-    primary_score = sorted_chunks[0]['confidence']
+    # One pass collects the best score, the high-confidence count and the exact
+    # match count; no sort is needed since only the top chunk is used
+    count_exact = exact_matches is None
+    primary_score = float('-inf')
+    high_confidence_count = 0
+    if count_exact:
+        exact_matches = 0
+    for chunk in chunks_with_confidence:
+        confidence = chunk['confidence']
+        if confidence > primary_score:
+            primary_score = confidence
+        if confidence > 0.6:
+            high_confidence_count += 1
+        if count_exact and query_lower in chunk['content'].lower():
+            exact_matches += 1
     
     # Secondary score from coverage
     coverage_bonus = 0.0
-    if len(sorted_chunks) > 1:
-        # For pinpoint, multiple good chunks indicate strong file relevance
-        high_confidence_chunks = [c for c in sorted_chunks if c['confidence'] > 0.6]
-        if len(high_confidence_chunks) > 1:
-            # More conservative boost than gist (since chunks are smaller)
-            coverage_bonus = min(0.15, len(high_confidence_chunks) * 0.05)
+    # For pinpoint, multiple good chunks indicate strong file relevance
+    if high_confidence_count > 1:
+        # More conservative boost than gist (since chunks are smaller)
+        coverage_bonus = min(0.15, high_confidence_count * 0.05)
     
     # Exact match distribution bonus
     exact_match_bonus = 0.0
-    query_lower = query.lower()
-    exact_matches = sum(1 for c in sorted_chunks if query_lower in c['content'].lower())
     if exact_matches > 1:
         exact_match_bonus = min(0.1, exact_matches * 0.03)
     
@@ -1436,20 +1990,22 @@ def rank_pinpoint_files(file_results, query: str):
     """
     Ranking system optimized for pinpoint mode characteristics.
     """
-    import os
+    query_lower = query.lower()
     
     # Add file-level metrics
     for file_result in file_results:
         chunks = file_result.get('matches', [])
         
-        # Calculate file-level confidence
-        file_result['aggregated_confidence'] = aggregate_pinpoint_chunks_for_file(chunks, query)
-        
-        # Add exact match indicators
-        query_lower = query.lower()
-        file_result['exact_matches'] = sum(
+        # Add exact match indicators (each chunk is lowercased once and the
+        # count is shared with the aggregation below)
+        exact_matches = sum(
             1 for chunk in chunks if query_lower in chunk['content'].lower()
         )
+        file_result['exact_matches'] = exact_matches
+        
+        # Calculate file-level confidence
+        file_result['aggregated_confidence'] = aggregate_pinpoint_chunks_for_file(chunks, query, query_lower,
+                                                                                  exact_matches)
         
         # Add filename relevance
         filename_lower = os.path.basename(file_result['file_path']).lower()
@@ -1466,88 +2022,164 @@ def rank_pinpoint_files(file_results, query: str):
     
     return sorted(file_results, key=sort_key, reverse=True)
 
-def compute_enhanced_gist_confidence(query: str, chunk_content: str, file_path: str, raw_distance: float) -> float:
+# Tokenizers shared by the confidence scorers
+_WORD_RE = re.compile(r'\w+')
+_SPLIT_RE = re.compile(r'[^\w]+')
+
+_GIST_STOP_WORDS = frozenset({'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy', 'did', 'she', 'use', 'way', 'will', 'about', 'file', 'files', 'document', 'text'})
+
+# Common plural endings: "ies" after 2+ letters (stories -> story), or a single
+# "s" after 3+ letters not preceded by another s (soldiers -> soldier, not class)
+_PLURAL_RE = re.compile(r'(?:(?<=..)ies|(?<=...)(?<!s)s)\Z')
+
+@functools.lru_cache(maxsize=4096)
+def normalize_word(word):
+    """Normalize words to handle plural/singular variations"""
+    return _PLURAL_RE.sub(lambda m: 'y' if len(m.group()) == 3 else '', word.lower().strip(), count=1)
+
+# Query-dependent inputs of compute_enhanced_gist_confidence, computed once per search
+QueryCtx = namedtuple("QueryCtx", [
+    "words_raw", "words_filtered", "words_normalized", "stop_word_ratio", "semantic_compensation"
+])
+
+def prepare_query(query: str) -> QueryCtx:
+    """Tokenize and normalize a gist query once for scoring all of its chunks"""
+    words_raw = [word for word in _SPLIT_RE.split(query) if word]
+    words_lower = [word.lower() for word in words_raw]
+    words_filtered = [word for word in words_lower if len(word) >= 2 and word not in _GIST_STOP_WORDS]
+    words_normalized = [normalize_word(word) for word in words_filtered]
+    
+    # Queries made mostly of stop words ("file about barbarian") embed diluted,
+    # so their base semantic score gets compensated
+    stop_word_ratio = sum(1 for word in words_lower if word in _GIST_STOP_WORDS) / max(1, len(words_raw))
+    semantic_compensation = 1.0 + (stop_word_ratio * 0.6) if stop_word_ratio > 0.4 else 1.0
+    return QueryCtx(words_raw, words_filtered, words_normalized, stop_word_ratio, semantic_compensation)
+
+@functools.lru_cache(maxsize=8192)
+def gist_filename_words(file_path: str) -> tuple:
     """
-    Semantically intelligent confidence calculation that prioritizes semantic understanding
-    while appropriately boosting exact matches. Handles query variations like barbarian vs barbarians.
+    Normalized filename stem and its words, as matched against gist query words.
+    Cached per path since a file usually contributes several chunks to one search.
     """
-    import re
-    
-    # Step 1: PRECISION-FOCUSED BASE SCORE (production-grade discrimination)
-    # ChromaDB cosine distances: 0 = identical, ~2+ = very different
-    # More conservative scoring to prevent over-scoring and improve discrimination
-    if raw_distance <= 0.4:
-        base_semantic = 1.0 - (raw_distance / 0.4) * 0.15  # 0.85-1.0 range (truly excellent matches only)
-    elif raw_distance <= 0.8:
-        base_semantic = 0.85 - ((raw_distance - 0.4) / 0.4) * 0.25  # 0.6-0.85 range (good matches)
-    elif raw_distance <= 1.2:
-        base_semantic = 0.6 - ((raw_distance - 0.8) / 0.4) * 0.25  # 0.35-0.6 range (moderate matches)
-    elif raw_distance <= 1.6:
-        base_semantic = 0.35 - ((raw_distance - 1.2) / 0.4) * 0.2  # 0.15-0.35 range (weak matches)
-    elif raw_distance <= 2.0:
-        base_semantic = 0.15 - ((raw_distance - 1.6) / 0.4) * 0.1  # 0.05-0.15 range (very weak)
-    else:
-        base_semantic = max(0.0, 0.05 - ((raw_distance - 2.0) / 1.0) * 0.05)  # 0-0.05 range (irrelevant)
+    filename = os.path.basename(file_path).lower()
+    filename_without_ext = os.path.splitext(filename)[0].replace('_', ' ')
+    filename_normalized = normalize_word(filename_without_ext)
+    return filename_normalized, tuple(_WORD_RE.findall(filename_normalized))
+
+@functools.lru_cache(maxsize=1)
+def get_gist_reranker():
+    """Cross-encoder for reranking the top gist results (loaded once), or None when disabled"""
+    if not GIST_RERANK_MODEL:
+        return None
+    try:
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(GIST_RERANK_MODEL)
+    except Exception as e:
+        print(f"Gist reranker {GIST_RERANK_MODEL} unavailable, using embedding scores only: {e}")
+        return None
+
+def rerank_gist_results(query: str, ranked: list, n: int) -> list:
+    """
+    The n best gist results. With a reranker configured, the top GIST_RERANK_TOP_K results
+    by confidence are reordered by one batched cross-encoder pass over their best chunks.
+    """
+    reranker = get_gist_reranker()
+    if reranker is None or not ranked:
+        return heapq.nlargest(n, ranked, key=lambda r: r["confidence"])
     
+    top = heapq.nlargest(max(n, GIST_RERANK_TOP_K), ranked, key=lambda r: r["confidence"])
+    head, tail = top[:GIST_RERANK_TOP_K], top[GIST_RERANK_TOP_K:]
+    try:
+        scores = reranker.predict([(query, r["best_content"]) for r in head],
+                                  batch_size=EMBEDDING_BATCH_SIZE, show_progress_bar=False)
+        order = sorted(range(len(head)), key=lambda i: scores[i], reverse=True)
+        head = [head[i] for i in order]
+    except Exception as e:
+        print(f"Gist rerank failed, keeping embedding order: {e}")
+    return (head + tail)[:n]
+
+def encode_gist_terms(terms) -> dict:
+    """
+    Unit-length gist embeddings for short terms (query words, filename words).
+    All unique terms go through the shared gist batcher in one request; its LRU
+    cache keeps term embeddings warm across searches. The batcher already encodes
+    with normalize_embeddings=True, so rows are used as returned.
+    """
+    unique_terms = list(dict.fromkeys(terms))
+    if not unique_terms:
+        return {}
+    embeddings = np.asarray(get_batcher_for_mode('gist').encode(unique_terms), dtype=np.float32)
+    return dict(zip(unique_terms, embeddings))
+
+def compute_gist_base_semantic_batch(raw_distances) -> np.ndarray:
+    """
+    Gist base semantic score for a whole array of query distances at once.
+    ChromaDB distances: 0 = identical, ~2+ = very different; the mapping is deliberately
+    conservative to keep discrimination between good and mediocre matches.
+    """
+    d = np.asarray(raw_distances, dtype=np.float64)
+    return np.select(
+        [d <= 0.4, d <= 0.8, d <= 1.2, d <= 1.6, d <= 2.0],
+        [
+            1.0 - (d / 0.4) * 0.15,               # 0.85-1.0 range
+            0.85 - ((d - 0.4) / 0.4) * 0.25,      # 0.6-0.85 range
+            0.6 - ((d - 0.8) / 0.4) * 0.25,       # 0.35-0.6 range
+            0.35 - ((d - 1.2) / 0.4) * 0.2,       # 0.15-0.35 range
+            0.15 - ((d - 1.6) / 0.4) * 0.1,       # 0.05-0.15 range
+        ],
+        default=np.maximum(0.0, 0.05 - ((d - 2.0) / 1.0) * 0.05)  # 0-0.05 range
+    )
+
+def gist_confidence_features(qctx: QueryCtx, chunk_content: str, file_path: str, base_semantic: float,
+                             term_embeddings: dict = None) -> tuple:
+    """
+    Per-chunk inputs of the gist confidence formula: the adjusted base semantic score,
+    the total filename boost, the content match count and the exact filename match count.
+    This is the string work; finalize_gist_confidence_batch combines the numbers.
+    qctx is the prepared query (see prepare_query). term_embeddings maps query and filename
+    words to unit embeddings (see encode_gist_terms); without it only exact filename
+    matches are boosted.
+    """
     # Step 2: SMART QUERY PROCESSING (handle variations like barbarian/barbarians)
-    def normalize_word(word):
-        """Normalize words to handle plural/singular variations"""
-        word = word.lower().strip()
-        # Handle common plural patterns
-        if word.endswith('ies') and len(word) > 4:
-            return word[:-3] + 'y'  # stories -> story
-        elif word.endswith('s') and len(word) > 3 and not word.endswith('ss'):
-            return word[:-1]  # barbarians -> barbarian, soldiers -> soldier
-        return word
+    # Query words are tokenized and normalized once per search by prepare_query
+    query_words_normalized = qctx.words_normalized
     
-    # Extract and normalize query words
-    stop_words = {'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy', 'did', 'she', 'use', 'way', 'will', 'about', 'file', 'files', 'document', 'text'}
-    
-    query_words_raw = [word for word in re.split(r'[^\w]+', query) if word.strip()]
-    query_words_filtered = [word.lower() for word in query_words_raw if len(word) >= 2 and word.lower() not in stop_words]
-    query_words_normalized = [normalize_word(word) for word in query_words_filtered]
+    # The base score adjustments below are all multipliers >= 1 and every tier threshold
+    # is below 1, so one clamp at the end matches clamping after each step
     
     # CRITICAL: Adjust base semantic score if query had many stop words
     # This compensates for the fact that ChromaDB embedding includes stop words
-    stop_word_ratio = len([w for w in query_words_raw if w.lower() in stop_words]) / max(1, len(query_words_raw))
-    if stop_word_ratio > 0.4:  # Query like "file about barbarian" has 66% stop words
-        # Boost base semantic to compensate for stop word dilution
-        semantic_compensation = 1.0 + (stop_word_ratio * 0.6)  # Up to 60% boost
-        base_semantic = min(1.0, base_semantic * semantic_compensation)
+    if qctx.stop_word_ratio > 0.4:  # Query like "file about barbarian" has 66% stop words
+        # Boost base semantic to compensate for stop word dilution (up to 60%)
+        base_semantic *= qctx.semantic_compensation
     
     # SEMANTIC EQUIVALENCE BOOST: Reduce gaps between singular/plural and related terms
     # Check if this appears to be a high-quality semantic match that might need boosting
+    # Tokenize the chunk once; word-boundary probes become set lookups
     content_lower = chunk_content.lower()
-    has_direct_word_match = any(
-        re.search(r'\b' + re.escape(word) + r'\b', content_lower) 
-        for word in query_words_normalized
-    )
+    content_tokens = set(_WORD_RE.findall(content_lower))
+    has_direct_word_match = any(word in content_tokens for word in query_words_normalized)
     
     # ENHANCED SEMANTIC EQUIVALENCE: Boost relevant content more aggressively
-    if has_direct_word_match and base_semantic > 0.5:
-        # Strong boost for high semantic + word match combination
-        base_semantic = min(1.0, base_semantic * 1.25)  # 25% boost for semantic+word consistency
-    elif has_direct_word_match and base_semantic > 0.3:
-        # Moderate boost for decent semantic + word match
-        base_semantic = min(1.0, base_semantic * 1.15)  # 15% boost for moderate semantic+word
-    elif has_direct_word_match and base_semantic > 0.15:
-        # Small boost even for weak semantic if there's exact word match
-        base_semantic = min(1.0, base_semantic * 1.08)  # 8% boost for weak semantic+word
+    if has_direct_word_match:
+        if base_semantic > 0.5:
+            base_semantic *= 1.25  # 25% boost for semantic+word consistency
+        elif base_semantic > 0.3:
+            base_semantic *= 1.15  # 15% boost for moderate semantic+word
+        elif base_semantic > 0.15:
+            base_semantic *= 1.08  # 8% boost even for weak semantic if there's exact word match
     
     # Additional boost for files that are clearly relevant but might have lower base scores
     # This helps with the comprehensive dataset where distances are more spread out
     if base_semantic > 0.4:
-        base_semantic = min(1.0, base_semantic * 1.1)   # 10% general boost for good matches
+        base_semantic *= 1.1   # 10% general boost for good matches
+    base_semantic = min(1.0, base_semantic)
     
     if not query_words_normalized:
-        return base_semantic
+        return base_semantic, 0.0, 0, 0
     
     # Step 3: INTELLIGENT FILENAME SIMILARITY (exact + semantic)
-    filename = os.path.basename(file_path).lower()
-    filename_without_ext = os.path.splitext(filename)[0].replace('_', ' ')
-    filename_normalized = normalize_word(filename_without_ext)
-    
-    filename_boost = 1.0
+    filename_normalized, filename_words = gist_filename_words(file_path)
     
     # A) Exact normalized matches (barbarian matches barbarians_2.txt)
     exact_filename_matches = 0
@@ -1556,63 +2188,35 @@ def compute_enhanced_gist_confidence(query: str, chunk_content: str, file_path:
             exact_filename_matches += 1
     
     # B) Semantic filename similarity (soldiers -> warriors.txt)
+    # Embeddings are precomputed once per search; this is just a small matmul.
+    # Skipped when it cannot change the outcome: every query word already matched
+    # the filename exactly, the chunk is clearly irrelevant, or it is already saturating
     semantic_filename_boost = 0.0
-    try:
-        # Get the global model from the search function context
-        # For now, we'll use a simpler approach based on word relationships
-        # AI-MODEL-DRIVEN semantic relationships - let the model decide!
-        # Use the embedding model to determine semantic relationships between query and filename
-        if 'gist_model' in globals():
-            model = gist_model
-        else:
-            # Fallback: load model if not available
-            from sentence_transformers import SentenceTransformer, util
-            model = SentenceTransformer("sentence-transformers/msmarco-MiniLM-L6-cos-v5")
-        
-        # Compare query words to filename words using AI embeddings
-        filename_words = re.findall(r'\b\w+\b', filename_normalized)
-        
-        for query_word in query_words_normalized:
-            if len(query_word) < 3:  # Skip very short words
-                continue
-                
-            query_embedding = model.encode([query_word])
-            
-            for filename_word in filename_words:
-                if len(filename_word) < 3:  # Skip very short words
-                    continue
-                    
-                filename_embedding = model.encode([filename_word])
-                
-                # Calculate semantic similarity using the AI model
-                similarity = util.cos_sim(query_embedding, filename_embedding).item()
-                
-                # If AI model finds high semantic similarity (>0.7), apply boost
-                if similarity > 0.7:
-                    semantic_filename_boost += similarity * 0.2  # Boost based on AI confidence
-                    break  # One boost per query word
-
-    except Exception as e:
-        pass  # Fall back to exact matching only
+    needs_semantic_filename = (
+        exact_filename_matches < len(query_words_normalized)
+        and 0.15 <= base_semantic <= 0.9
+    )
+    if term_embeddings and needs_semantic_filename:
+        semantic_query_words = [w for w in query_words_normalized
+                                if len(w) >= 3 and w in term_embeddings]
+        semantic_filename_words = [w for w in filename_words
+                                   if len(w) >= 3 and w in term_embeddings]
+        if semantic_query_words and semantic_filename_words:
+            similarities = (np.stack([term_embeddings[w] for w in semantic_query_words])
+                            @ np.stack([term_embeddings[w] for w in semantic_filename_words]).T)
+            # One boost per query word, from the first filename word above the threshold
+            above = similarities > 0.7
+            matched = above.any(axis=1)
+            first_match = above.argmax(axis=1)
+            semantic_filename_boost = float(similarities[matched, first_match[matched]].sum()) * 0.2
     
     # Combine exact and semantic filename boosts
     total_filename_boost = exact_filename_matches * 0.4 + semantic_filename_boost
     
-    if total_filename_boost > 0:
-        # Apply filename boost, but only if semantic baseline exists
-        if base_semantic > 0.3:
-            filename_boost = 1.0 + total_filename_boost  # Full boost for good semantic match
-        elif base_semantic > 0.1:
-            filename_boost = 1.0 + (total_filename_boost * 0.5)  # Reduced boost for weak semantic
-        else:
-            filename_boost = 1.0 + (total_filename_boost * 0.2)  # Minimal boost for very weak semantic
-    
     # Step 4: CONTENT WORD MATCHING (with normalization)
-    content_lower = chunk_content.lower()
-    content_boost = 1.0
-    
     # Check for normalized word matches in content (more sophisticated matching)
     content_matches = 0
+    content_prefixes = None  # 4-letter token prefixes, built on first root-word check
     for query_word in query_words_normalized:
         # Check both exact and plural/singular variations
         variations = [query_word]
@@ -1629,7 +2233,7 @@ def compute_enhanced_gist_confidence(query: str, chunk_content: str, file_path:
         # Check for any variation match
         found_match = False
         for variation in variations:
-            if re.search(r'\b' + re.escape(variation) + r'\b', content_lower):
+            if variation in content_tokens:
                 content_matches += 1
                 found_match = True
                 break
@@ -1637,36 +2241,64 @@ def compute_enhanced_gist_confidence(query: str, chunk_content: str, file_path:
         # If no exact match, check for root word matches (more semantic flexibility)
         if not found_match and len(query_word) >= 4:
             root_word = query_word[:4]  # Check first 4 letters
-            if re.search(r'\b' + re.escape(root_word) + r'\w*', content_lower):
+            if content_prefixes is None:
+                content_prefixes = {token[:4] for token in content_tokens if len(token) >= 4}
+            if root_word in content_prefixes:
                 content_matches += 0.5  # Half credit for root matches
     
-    if content_matches > 0:
-        # More generous content boost for high-quality matches
-        if content_matches >= 1.5:  # Strong matches (exact + root)
-            content_boost = 1.0 + (content_matches * 0.3)  # 30% boost per concept
-        else:
-            content_boost = 1.0 + (content_matches * 0.25)  # 25% boost per concept
+    return base_semantic, total_filename_boost, content_matches, exact_filename_matches
+
+def finalize_gist_confidence_batch(base_semantic, total_filename_boost, content_matches,
+                                   exact_filename_matches) -> np.ndarray:
+    """
+    Combine gist confidence features (see gist_confidence_features) for many chunks at once.
+    Steps 3-6 of the gist formula as array arithmetic over parallel per-chunk arrays.
+    """
+    base = np.asarray(base_semantic, dtype=np.float64)
+    filename_total = np.asarray(total_filename_boost, dtype=np.float64)
+    content_matches = np.asarray(content_matches, dtype=np.float64)
+    total_matches = np.asarray(exact_filename_matches, dtype=np.float64) + content_matches
     
-    # Step 5: ENHANCED SEMANTIC COHERENCE (more generous for relevant content)
-    coherence_multiplier = 1.0
-    total_matches = exact_filename_matches + content_matches
+    # Filename boost, but only in full if a semantic baseline exists
+    filename_boost = 1.0 + filename_total * np.select(
+        [base > 0.3, base > 0.1],
+        [1.0, 0.5],            # Full boost for good, reduced boost for weak semantic match
+        default=0.2            # Minimal boost for very weak semantic
+    )
     
-    if base_semantic > 0.5 and total_matches > 0:
-        coherence_multiplier = 1.3  # 30% bonus for good semantic + exact matches
-    elif base_semantic > 0.3 and total_matches > 0:
-        coherence_multiplier = 1.2  # 20% bonus for moderate semantic + exact matches
-    elif base_semantic > 0.2 and total_matches > 1:
-        coherence_multiplier = 1.15 # 15% bonus for weak semantic + multiple matches
-    elif base_semantic > 0.4:
-        coherence_multiplier = 1.1  # 10% bonus for good semantic even without exact matches
-    elif base_semantic < 0.1 and total_matches == 0:
-        coherence_multiplier = 0.2  # Heavy penalty for poor semantic + no matches
+    # More generous content boost for strong (exact + root) matches: 30% vs 25% per concept
+    content_boost = 1.0 + content_matches * np.where(content_matches >= 1.5, 0.3, 0.25)
     
-    # Step 6: COMBINE FACTORS (semantic-first approach)
-    final_confidence = base_semantic * filename_boost * content_boost * coherence_multiplier
+    # Step 5: ENHANCED SEMANTIC COHERENCE (more generous for relevant content)
+    coherence_multiplier = np.select(
+        [
+            (base > 0.5) & (total_matches > 0),   # good semantic + exact matches
+            (base > 0.3) & (total_matches > 0),   # moderate semantic + exact matches
+            (base > 0.2) & (total_matches > 1),   # weak semantic + multiple matches
+            base > 0.4,                           # good semantic even without exact matches
+            (base < 0.1) & (total_matches == 0),  # heavy penalty for poor semantic + no matches
+        ],
+        [1.3, 1.2, 1.15, 1.1, 0.2],
+        default=1.0
+    )
     
-    # Ensure confidence stays in [0, 1] range
-    return max(0.0, min(1.0, final_confidence))
+    # Step 6: COMBINE FACTORS (semantic-first approach), kept in [0, 1]
+    return np.clip(base * filename_boost * content_boost * coherence_multiplier, 0.0, 1.0)
+
+def compute_enhanced_gist_confidence(qctx: QueryCtx, chunk_content: str, file_path: str, raw_distance: float,
+                                     term_embeddings: dict = None, base_semantic: float = None) -> float:
+    """
+    Semantically intelligent confidence calculation that prioritizes semantic understanding
+    while appropriately boosting exact matches. Handles query variations like barbarian vs barbarians.
+    Scores a single chunk; search_gist_mode scores all chunks of a query in one batch.
+    """
+    # Step 1: PRECISION-FOCUSED BASE SCORE (see compute_gist_base_semantic_batch)
+    if base_semantic is None:
+        base_semantic = float(compute_gist_base_semantic_batch([raw_distance])[0])
+    features = gist_confidence_features(qctx, chunk_content, file_path, base_semantic, term_embeddings)
+    if not qctx.words_normalized:
+        return features[0]
+    return float(finalize_gist_confidence_batch(*([feature] for feature in features))[0])
 
 def search_gist_mode(query: str, query_embedding, model, top_files: int, page: int = 1, page_size: int = 10, filters: dict = None):
     """
@@ -1677,7 +2309,8 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
         # Query across all gist chunks
         chunk_results = gist_collection.query(
             query_embeddings=[query_embedding],
-            n_results=MAX_SEARCH_RESULTS
+            n_results=MAX_SEARCH_RESULTS,
+            where=filters_to_where(filters)
         )
 
         if not chunk_results["metadatas"][0]:
@@ -1698,6 +2331,29 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
         documents = chunk_results["documents"][0]
         metadatas = chunk_results["metadatas"][0]
         distances = chunk_results["distances"][0]
+        base_scores = compute_gist_base_semantic_batch(distances).tolist()
+        qctx = prepare_query(query)
+
+        # Embed query words and all candidate filename words in one batch for
+        # semantic filename matching, instead of per chunk and per word
+        term_embeddings = {}
+        semantic_query_words = [w for w in qctx.words_normalized if len(w) >= 3]
+        if semantic_query_words:
+            filename_terms = [
+                word
+                for path in dict.fromkeys(meta.get("path") for meta in metadatas if meta.get("path"))
+                for word in gist_filename_words(path)[1]
+                if len(word) >= 3
+            ]
+            if filename_terms:
+                try:
+                    term_embeddings = encode_gist_terms(semantic_query_words + filename_terms)
+                except Exception as e:
+                    logger.debug("gist filename term encoding failed, using exact matches only: %s", e)
+
+        file_mtimes = prefetch_file_mtimes((meta.get("path") for meta in metadatas), filters)
+        matches_filters = compile_filters(filters)
+        chunk_features = []
 
         for j, meta in enumerate(metadatas):
             file_path = meta.get("path")
@@ -1706,7 +2362,7 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
 
             # Apply server-side filters early
             if filters is not None:
-                if not file_matches_filters(file_path, meta.get("file_type", ""), filters, meta):
+                if not matches_filters(file_path, meta.get("file_type", ""), meta, file_mtimes.get(file_path)):
                     continue
 
             # Use enhanced confidence calculation
@@ -1716,20 +2372,30 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
                 continue
                 
             content = documents[j]
-            raw_distance = float(distances[j])
-            confidence = compute_enhanced_gist_confidence(query, content, file_path, raw_distance)
+            chunk_features.append(gist_confidence_features(qctx, content, file_path, base_scores[j], term_embeddings))
 
-            # Create hit entry for gist_ranking
+            # Create hit entry for gist_ranking; confidence is filled in below.
+            # Only the excerpt-sized prefix of the chunk (plus one character to tell
+            # whether it was cut) outlives scoring
             hits.append({
                     "file_path": file_path,
                     "file_name": meta.get("fname", os.path.basename(file_path)),
                     "file_type": meta.get("file_type", ""),
-                "confidence": confidence,
-                "content": content,
+                "confidence": 0.0,
+                "content": content[:GIST_EXCERPT_MAX_LENGTH + 1],
                 "chunk_index": meta.get("chunk_id", 1),
-                "start_line": meta.get("line_ranges", "1")
+                "start_line": (decode_line_ranges(meta.get("line_ranges")) or [1])[0]
             })
 
+        # Enhanced confidence for all kept chunks in one vectorized pass
+        if hits:
+            if qctx.words_normalized:
+                confidences = finalize_gist_confidence_batch(*zip(*chunk_features)).tolist()
+            else:
+                confidences = [features[0] for features in chunk_features]
+            for hit, confidence in zip(hits, confidences):
+                hit["confidence"] = confidence
+
         # Group hits by file for multi-chunk boosting
         files_data = {}
         for hit in hits:
@@ -1809,6 +2475,7 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
                 "file_name": file_data["file_name"],
                 "file_type": file_data["file_type"], 
                 "confidence": final_score,
+                "best_content": best_chunk["content"],
                     "best_chunk": {
                         "content": excerpt,
                     "chunk_id": best_chunk["chunk_index"],
@@ -1816,14 +2483,12 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
                     }
             })
 
-        # Sort by final confidence score
-        ranked.sort(key=lambda r: r["confidence"], reverse=True)
         total_files = len(ranked)
 
-        # Apply pagination
+        # Apply pagination; only the files up to the requested page need ordering
         start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
-        paginated = ranked[start_idx:end_idx]
+        paginated = rerank_gist_results(query, ranked, end_idx)[start_idx:end_idx]
 
         total_pages = (total_files + page_size - 1) // page_size
         has_more = page < total_pages
@@ -1844,7 +2509,7 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
                 }]
             })
 
-        return jsonify({
+        return json_response({
             "results": formatted_results,
             "query": query,
             "total_files": total_files,
@@ -1858,7 +2523,6 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
 
     except Exception as e:
         print(f"GIST SEARCH: Fatal error: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({
             "error": f"Gist search error: {str(e)}",
@@ -1866,6 +2530,35 @@ def search_gist_mode(query: str, query_embedding, model, top_files: int, page: i
             "chunking_mode": "gist"
         }), 500
 
+def query_top_chunks_per_file(collection, query_embedding, file_paths, n_per_file):
+    """
+    Best n_per_file chunks of each file for a query, as {path: [(metadata, document, distance)]}
+    in ascending distance order. One $in-filtered query covers all files; files that may have
+    been crowded out of a truncated result fall back to their own query.
+    """
+    file_paths = list(dict.fromkeys(file_paths))
+    by_file = {path: [] for path in file_paths}
+    if not file_paths or n_per_file <= 0:
+        return by_file
+    
+    n_results = n_per_file * len(file_paths)
+    where = {"path": file_paths[0]} if len(file_paths) == 1 else {"path": {"$in": file_paths}}
+    results = collection.query(query_embeddings=[query_embedding], n_results=n_results, where=where)
+    metadatas, documents, distances = results["metadatas"][0], results["documents"][0], results["distances"][0]
+    for meta, doc, distance in zip(metadatas, documents, distances):
+        chunks = by_file.get(meta.get("path"))
+        if chunks is not None and len(chunks) < n_per_file:
+            chunks.append((meta, doc, distance))
+    
+    # A result shorter than n_results means every matching chunk was returned
+    if len(metadatas) >= n_results:
+        for path, chunks in by_file.items():
+            if len(chunks) < n_per_file:
+                results = collection.query(query_embeddings=[query_embedding], n_results=n_per_file,
+                                           where={"path": path})
+                by_file[path] = list(zip(results["metadatas"][0], results["documents"][0], results["distances"][0]))
+    return by_file
+
 @app.route('/api/search', methods=['POST'])
 def search_files():
     """Perform semantic search with pagination support"""
@@ -1892,12 +2585,11 @@ def search_files():
     try:
         # Encode query using appropriate model for the chunking mode
         current_model = get_model_for_mode(chunking_mode)
-        q_emb = current_model.encode(query)
+        q_emb = encode_query_cached(query, chunking_mode)
         
         # Route to specialized search implementations
-        print(f"SEARCH DEBUG: chunking_mode='{chunking_mode}', query='{query}'")
+        logger.debug("Search: chunking_mode=%r, query=%r", chunking_mode, query)
         if chunking_mode == 'gist':
-            print(f"ROUTING TO GIST MODE")
             return search_gist_mode(query, q_emb, current_model, top_files, page, page_size, filters)
         elif chunking_mode == 'pinpoint':
             target_collection = pinpoint_collection
@@ -1906,17 +2598,21 @@ def search_files():
             # Step 1: Find top files using the target collection
             file_results = target_collection.query(
                 query_embeddings=[q_emb], 
-                n_results=min(top_files * 2, MAX_SEARCH_RESULTS)
+                n_results=min(top_files * 2, MAX_SEARCH_RESULTS),
+                where=filters_to_where(filters)
             )
         else:
             # Fallback to legacy collections
             target_collection = filelevel_collection
             mode_description = "legacy mode"
             
-            # Step 1: Find top files using the target collection
+            # Step 1: Find top files using the target collection; legacy scoring
+            # only needs distances, chunk text is fetched per file in step 2
             file_results = target_collection.query(
                 query_embeddings=[q_emb], 
-                n_results=min(top_files * 2, MAX_SEARCH_RESULTS)
+                n_results=min(top_files * 2, MAX_SEARCH_RESULTS),
+                where=filters_to_where(filters),
+                include=["metadatas", "distances"]
             )
         
         if not file_results["metadatas"][0]:
@@ -1935,6 +2631,13 @@ def search_files():
         file_scores = {}
         file_metadata = {}
         
+        file_mtimes = prefetch_file_mtimes((meta.get("path") for meta in file_results["metadatas"][0]), filters)
+        matches_filters = compile_filters(filters)
+        query_lower = query.lower()
+        if chunking_mode == 'pinpoint':
+            # Base scores for every candidate in one vectorized pass
+            base_scores = compute_pinpoint_base_semantic_batch(file_results["distances"][0]).tolist()
+        
         for i, meta in enumerate(file_results["metadatas"][0]):
             file_path = meta["path"]
             score = file_results["distances"][0][i]
@@ -1942,31 +2645,38 @@ def search_files():
             
             # Use enhanced confidence calculation for pinpoint mode
             if chunking_mode == 'pinpoint':
-                confidence = compute_enhanced_pinpoint_confidence(query, content, file_path, score)
+                confidence = compute_enhanced_pinpoint_confidence(query, content, file_path, score, query_lower,
+                                                                  base_scores[i])
             else:
                 confidence = 1 - score
             
             # Apply server-side filters at file level
             if filters is not None:
-                if not file_matches_filters(file_path, meta.get("file_type", ""), filters, meta):
+                if not matches_filters(file_path, meta.get("file_type", ""), meta, file_mtimes.get(file_path)):
                     continue
 
             if file_path not in file_scores or confidence > file_scores[file_path]:
                 file_scores[file_path] = confidence
                 file_metadata[file_path] = meta
         
-        # Sort files by score and take top N
-        sorted_files = sorted(file_scores.items(), key=lambda x: x[1], reverse=True)
-        total_files = len(sorted_files)
+        total_files = len(file_scores)
         
-        # Apply pagination
+        # Apply pagination; partial sort of the files up to the requested page
         start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
-        paginated_files = sorted_files[start_idx:end_idx]
+        paginated_files = heapq.nlargest(end_idx, file_scores.items(), key=lambda x: x[1])[start_idx:end_idx]
         
         results = []
         
-        # Step 2: For each file, get detailed results from the same collection
+        # Step 2: Get detailed results for all paginated files from the same collection at once
+        try:
+            file_chunks = query_top_chunks_per_file(
+                target_collection, q_emb, [file_path for file_path, _ in paginated_files], top_chunks_per_file
+            )
+        except Exception as e:
+            print(f"Error searching chunks in files: {e}")
+            file_chunks = {}
+        
         for file_path, file_confidence in paginated_files:
             meta = file_metadata[file_path]
             fname = meta["fname"]
@@ -1980,38 +2690,31 @@ def search_files():
                 "matches": []
             }
             
-            # Get detailed results from the target collection
-            try:
-                chunk_results = target_collection.query(
-                    query_embeddings=[q_emb], 
-                    n_results=top_chunks_per_file,
-                    where={"path": file_path}
-                )
+            chunks = file_chunks.get(file_path, [])
+            if chunking_mode == 'pinpoint':
+                chunk_base_scores = compute_pinpoint_base_semantic_batch([distance for _, _, distance in chunks]).tolist()
+            
+            for j, (chunk_meta, chunk_doc, chunk_distance) in enumerate(chunks):
+                chunk_id = chunk_meta["chunk_id"]
+                chunk_size = chunk_meta["chunk_size"]
                 
-                for j, chunk_meta in enumerate(chunk_results["metadatas"][0]):
-                    chunk_id = chunk_meta["chunk_id"]
-                    chunk_doc = chunk_results["documents"][0][j]
-                    chunk_size = chunk_meta["chunk_size"]
-                    chunk_distance = chunk_results["distances"][0][j]
-                    
-                    # Use enhanced confidence calculation for pinpoint mode
-                    if chunking_mode == 'pinpoint':
-                        chunk_score = compute_enhanced_pinpoint_confidence(query, chunk_doc, file_path, chunk_distance)
-                    else:
-                        chunk_score = 1 - chunk_distance
-                    
-                    # Truncate long chunks for display
-                    display_chunk = chunk_doc[:MAX_CHUNK_DISPLAY_LENGTH] + "..." if len(chunk_doc) > MAX_CHUNK_DISPLAY_LENGTH else chunk_doc
-                    
-                    file_result["matches"].append({
-                        "type": "chunk",
-                        "chunk_id": chunk_id,
-                        "chunk_size": chunk_size,
-                        "content": display_chunk.strip(),
-                        "confidence": chunk_score
-                    })
-            except Exception as e:
-                print(f"Error searching chunks in file: {e}")
+                # Use enhanced confidence calculation for pinpoint mode
+                if chunking_mode == 'pinpoint':
+                    chunk_score = compute_enhanced_pinpoint_confidence(query, chunk_doc, file_path, chunk_distance, query_lower,
+                                                                       chunk_base_scores[j])
+                else:
+                    chunk_score = 1 - chunk_distance
+                
+                # Truncate long chunks for display
+                display_chunk = chunk_doc[:MAX_CHUNK_DISPLAY_LENGTH] + "..." if len(chunk_doc) > MAX_CHUNK_DISPLAY_LENGTH else chunk_doc
+                
+                file_result["matches"].append({
+                    "type": "chunk",
+                    "chunk_id": chunk_id,
+                    "chunk_size": chunk_size,
+                    "content": display_chunk.strip(),
+                    "confidence": chunk_score
+                })
             
             results.append(file_result)
         
@@ -2023,7 +2726,7 @@ def search_files():
         total_pages = (total_files + page_size - 1) // page_size
         has_more = page < total_pages
         
-        return jsonify({
+        return json_response({
             "results": results,
             "query": query,
             "total_files": total_files,
@@ -2056,15 +2759,15 @@ def toggle_granular_tracking():
                 file_ext = os.path.splitext(file_path)[1].lower()
                 fname = os.path.basename(file_path)
                 
-                for i, line in enumerate(lines):
-                    # Use pinpoint model for granular tracking (line-by-line)
-                    embedding = pinpoint_model.encode(line)
-                    unique_id = f"granular-{file_path}-{i+1}"
-                    granular_collection.add(
-                        embeddings=[embedding],
-                        documents=[line],
-                        metadatas=[{"path": file_path, "fname": fname, "line_num": i+1, "file_type": file_ext}],
-                        ids=[unique_id]
+                # Use pinpoint model for granular tracking (line-by-line), all lines in one batch
+                embeddings = get_batcher_for_mode('pinpoint').encode(lines)
+                with ChunkedInsert(granular_collection, chunksize=CHROMA_MAX_BATCH_SIZE) as writer:
+                    writer.add(
+                        embeddings,
+                        lines,
+                        [{"path": file_path, "fname": fname, "line_num": i + 1, "file_type": file_ext}
+                         for i in range(len(lines))],
+                        [f"granular-{file_path}-{i + 1}" for i in range(len(lines))]
                     )
                 
                 # Note: ChromaDB 1.0+ automatically persists data when using persist_directory
@@ -2098,10 +2801,8 @@ def reindex_file():
     if not os.path.exists(path):
         return jsonify({"error": "File not found"}), 404
     
-    # Start reindexing in background thread
-    thread = threading.Thread(target=reindex_path_background, args=(path, chunking_mode))
-    thread.daemon = True
-    thread.start()
+    # Start reindexing on the background pool
+    submit_background(reindex_path_background, path, chunking_mode)
     
     return jsonify({"message": f"Reindexing started for {os.path.basename(path)} in {chunking_mode} mode"})
 
@@ -2120,9 +2821,21 @@ def reindex_path_background(path, chunking_mode='gist'):
             target_collection = filelevel_collection
             chunking_function = create_large_chunks
         
-        # Remove existing entries for this file
+        # Remove existing entries for this file. Chunk IDs are derived from the
+        # chunk count recorded at the last index, so delete by ID when it is known
         try:
-            target_collection.delete(where={"path": path})
+            mode_info = metadata_tracker.metadata.get(path, {}).get('modes', {}).get(chunking_mode)
+            num_chunks = mode_info.get('num_chunks', 0) if mode_info else 0
+            if chunking_mode in ('gist', 'pinpoint') and num_chunks:
+                ids = [f"{chunking_mode}-{path}-{i+1}" for i in range(num_chunks)]
+                for start in range(0, len(ids), CHROMA_MAX_BATCH_SIZE):
+                    target_collection.delete(ids=ids[start:start + CHROMA_MAX_BATCH_SIZE])
+            
+            # The recorded count can be stale (interrupted index, failed sidecar save),
+            # so look up whatever is still stored for the path and delete that too
+            leftover_ids = target_collection.get(where={"path": path}, include=[])["ids"]
+            for start in range(0, len(leftover_ids), CHROMA_MAX_BATCH_SIZE):
+                target_collection.delete(ids=leftover_ids[start:start + CHROMA_MAX_BATCH_SIZE])
         except Exception as e:
             print(f"Warning: Could not remove existing entries: {e}")
         
@@ -2148,30 +2861,13 @@ def reindex_single_file(file_path, chunking_mode, target_collection, chunking_fu
             print(f"No chunks created for {file_path}")
             return
         
-        # Index chunks in the target collection
-        chunks_created = 0
-        # Select appropriate model for the chunking mode
-        current_model = get_model_for_mode(chunking_mode)
-        for chunk_idx, (chunk_text, line_ranges) in enumerate(chunks):
-            embedding = current_model.encode(chunk_text)
-            
-            unique_id = f"{chunking_mode}-{file_path}-{chunk_idx+1}"
-            target_collection.add(
-                embeddings=[embedding],
-                documents=[chunk_text],
-                metadatas=[{
-                    "path": file_path, 
-                    "fname": os.path.basename(file_path), 
-                    "file_type": file_ext,
-                    "chunk_id": chunk_idx + 1,
-                    "chunk_index": chunk_idx + 1,  # For compatibility with gist_ranking
-                    "line_ranges": str(line_ranges),
-                    "chunk_size": len(line_ranges),
-                    "chunking_mode": chunking_mode,
-                }],
-                ids=[unique_id]
-            )
-            chunks_created += 1
+        # Index chunks in the target collection: one batched encode with the
+        # model for this chunking mode, then one buffered write
+        documents, metadatas, ids = build_chunk_records(file_path, file_ext, chunking_mode, chunks)
+        embeddings = get_batcher_for_mode(chunking_mode).encode(documents)
+        with ChunkedInsert(target_collection, chunksize=CHROMA_MAX_BATCH_SIZE) as writer:
+            writer.add(embeddings, documents, metadatas, ids)
+        chunks_created = len(ids)
         
         # Skip gist-mode centroid/metadata computation to keep gist reindex simple
         
@@ -2212,6 +2908,27 @@ def get_config():
         "pinpoint_chunk_size": PINPOINT_CHUNK_SIZE
     })
 
+def iter_tracked_file_rows(chunking_mode, collection):
+    """
+    Yield (file_path, metadata) for each file indexed in a chunking mode.
+    Local files come from the per-file metadata tracker (one row per file). GitHub
+    files are never recorded there, so their chunk rows are read from the collection.
+    The whole collection is only scanned when the tracker knows no files for this mode.
+    Rows may repeat a path; callers deduplicate.
+    """
+    found = False
+    for file_path, file_info in list(metadata_tracker.metadata.items()):
+        mode_info = file_info.get('modes', {}).get(chunking_mode)
+        if mode_info is None:
+            continue
+        found = True
+        yield file_path, mode_info
+
+    results = collection.get(where={"source": "github"} if found else None, include=["metadatas"])
+    for metadata in results.get('metadatas') or []:
+        if metadata:
+            yield metadata.get('path'), metadata
+
 @app.route('/api/files/track', methods=['POST'])
 def get_tracked_files():
     """Get tracked files with pagination, search, and sorting"""
@@ -2237,125 +2954,99 @@ def get_tracked_files():
         if not collection:
             return jsonify({"error": f"Collection not available for {chunking_mode} mode"}), 500
         
-        # Get all files from the collection
+        # Get all files indexed in this mode
         try:
-            results = collection.get()
-            print(f"DEBUG: Got {len(results.get('metadatas', []))} metadata entries from {chunking_mode} collection")
-            
-            if not results or not results.get('metadatas'):
-                return jsonify({
-                    "files": [],
-                    "pagination": {
-                        "page": page,
-                        "page_size": page_size,
-                        "total_files": 0,
-                        "total_pages": 0,
-                        "has_more": False
-                    },
-                    "chunking_mode": chunking_mode,
-                })
-            
-            # Process file metadata
-            files_data = {}
-            for i, metadata in enumerate(results['metadatas']):
-                file_path = metadata.get('path')
-                if not file_path or file_path == 'None':
-                    continue
-                
-                # Skip if we already processed this file
-                if file_path in files_data:
-                    continue
+            seen = set()
+            total_files = 0
+
+            # Files with pending changes, looked up once per request
+            unsynced_paths = set()
+            if sync_tracker:
+                unsynced_paths = {f.file_path for f in sync_tracker.get_files_to_sync(chunking_mode)}
+
+            def iter_file_entries():
+                """Stream one entry per file that passes the search filter"""
+                nonlocal total_files
+                for file_path, metadata in iter_tracked_file_rows(chunking_mode, collection):
+                    if not file_path or file_path == 'None':
+                        continue
                 
-                # Debug: Print raw metadata for first few files
-                if i < 3:
-                    print(f"DEBUG: File {i+1} metadata: {metadata}")
+                    # Skip if we already processed this file
+                    if file_path in seen:
+                        continue
+                    seen.add(file_path)
                 
-                # Get file info - try multiple possible field names
-                file_name = os.path.basename(file_path)
-                parent_folder = os.path.dirname(file_path)
+                    # Get file info - try multiple possible field names
+                    file_name = os.path.basename(file_path)
+                    parent_folder = os.path.dirname(file_path)
                 
-                # Try to get file size from multiple possible sources
-                file_size = 0
-                if os.path.exists(file_path):
+                    # Try to get file size from multiple possible sources
                     try:
-                        file_size = os.path.getsize(file_path)
+                        file_size = os.stat(file_path).st_size
                     except OSError:
-                        pass
-                
-                # Try to get last indexed time from multiple possible sources
-                last_indexed = 0  # Default to 0 if no timestamp found
-                if metadata.get('last_indexed'):
-                    last_indexed = metadata.get('last_indexed')
-                elif metadata.get('modified_time'):
-                    last_indexed = metadata.get('modified_time')
-                elif metadata.get('timestamp'):
-                    last_indexed = metadata.get('timestamp')
+                        file_size = 0
                 
-                # If still no timestamp, try to get it from the metadata tracker
-                if last_indexed == 0 and file_path in metadata_tracker.metadata:
-                    stored_metadata = metadata_tracker.metadata[file_path]
-                    last_indexed = stored_metadata.get('last_indexed', 0)
+                    # Try to get last indexed time from multiple possible sources
+                    last_indexed = 0  # Default to 0 if no timestamp found
+                    if metadata.get('last_indexed'):
+                        last_indexed = metadata.get('last_indexed')
+                    elif metadata.get('modified_time'):
+                        last_indexed = metadata.get('modified_time')
+                    elif metadata.get('timestamp'):
+                        last_indexed = metadata.get('timestamp')
                 
-                # Try to get chunk count from multiple possible sources
-                num_chunks = 0
-                if metadata.get('n_chunks'):
-                    num_chunks = metadata.get('n_chunks')
-                elif metadata.get('chunk_count'):
-                    num_chunks = metadata.get('chunk_count')
-                elif metadata.get('num_chunks'):
-                    num_chunks = metadata.get('num_chunks')
+                    # Try to get chunk count from multiple possible sources
+                    num_chunks = 0
+                    if metadata.get('n_chunks'):
+                        num_chunks = metadata.get('n_chunks')
+                    elif metadata.get('chunk_count'):
+                        num_chunks = metadata.get('chunk_count')
+                    elif metadata.get('num_chunks'):
+                        num_chunks = metadata.get('num_chunks')
                 
-                # Check if file needs syncing
-                is_synced = True
-                if sync_tracker:
-                    files_to_sync = sync_tracker.get_files_to_sync(chunking_mode)
-                    is_synced = not any(f.file_path == file_path for f in files_to_sync)
+                    # Check if file needs syncing
+                    is_synced = file_path not in unsynced_paths
                 
-                # Apply search filter
-                if search_query:
-                    search_lower = search_query.lower()
-                    if (search_lower not in file_name.lower() and 
-                        search_lower not in parent_folder.lower()):
-                        continue
+                    # Apply search filter
+                    if search_query:
+                        search_lower = search_query.lower()
+                        if (search_lower not in file_name.lower() and 
+                            search_lower not in parent_folder.lower()):
+                            continue
                 
-                files_data[file_path] = {
-                    "file_path": file_path,
-                    "file_name": file_name,
-                    "parent_folder": parent_folder,
-                    "file_size": file_size,
-                    "last_indexed": last_indexed,
-                    "status": "Synced" if is_synced else "Out of sync",
-                    "is_synced": is_synced,
-                    "num_chunks": num_chunks,
-                    "chunking_mode": chunking_mode,
-                }
-            
-            print(f"DEBUG: Processed {len(files_data)} unique files")
+                    total_files += 1
+                    yield {
+                        "file_path": file_path,
+                        "file_name": file_name,
+                        "parent_folder": parent_folder,
+                        "file_size": file_size,
+                        "last_indexed": last_indexed,
+                        "status": "Synced" if is_synced else "Out of sync",
+                        "is_synced": is_synced,
+                        "num_chunks": num_chunks,
+                        "chunking_mode": chunking_mode,
+                    }
             
-            # Convert to list and sort
-            files_list = list(files_data.values())
+            # Keep only the files up to the end of the requested page; a bounded
+            # heap gives the same order as a full sort of every file
+            sort_keys = {
+                'file_name': lambda x: x['file_name'].lower(),
+                'file_size': lambda x: x['file_size'],
+                'parent_folder': lambda x: x['parent_folder'].lower(),
+                'status': lambda x: x['is_synced'],
+                'num_chunks': lambda x: x['num_chunks'],
+            }
+            sort_key = sort_keys.get(sort_by, lambda x: x['last_indexed'])  # last_indexed (default)
+            start_idx = (page - 1) * page_size
+            end_idx = start_idx + page_size
+            select = heapq.nlargest if sort_order == 'desc' else heapq.nsmallest
+            top_files = select(max(end_idx, 0), iter_file_entries(), key=sort_key)
             
-            # Apply sorting
-            reverse_sort = sort_order == 'desc'
-            if sort_by == 'file_name':
-                files_list.sort(key=lambda x: x['file_name'].lower(), reverse=reverse_sort)
-            elif sort_by == 'file_size':
-                files_list.sort(key=lambda x: x['file_size'], reverse=reverse_sort)
-            elif sort_by == 'parent_folder':
-                files_list.sort(key=lambda x: x['parent_folder'].lower(), reverse=reverse_sort)
-            elif sort_by == 'status':
-                files_list.sort(key=lambda x: x['is_synced'], reverse=reverse_sort)
-            elif sort_by == 'num_chunks':
-                files_list.sort(key=lambda x: x['num_chunks'], reverse=reverse_sort)
-            else:  # last_indexed (default)
-                files_list.sort(key=lambda x: x['last_indexed'], reverse=reverse_sort)
+            logger.debug("Processed %d unique files", total_files)
             
             # Apply pagination
-            total_files = len(files_list)
             total_pages = (total_files + page_size - 1) // page_size
-            start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
-            paginated_files = files_list[start_idx:end_idx]
+            paginated_files = top_files[start_idx:end_idx]
             
             return jsonify({
                 "files": paginated_files,
@@ -2393,6 +3084,9 @@ def get_metadata_stats():
             stats["gist_centroids_available"] = False
             stats["gist_centroids_error"] = str(e)
         
+        # Reindex/sync jobs queued or running on the background pool
+        stats["background_jobs"] = _background_jobs
+        
         # Add collection counts
         try:
             stats["collections"] = {
@@ -2433,7 +3127,7 @@ def get_gist_stats():
         # Sample some gist metadata if available
         try:
             if stats["centroid_count"] > 0:
-                sample_results = gist_centroids_collection.get(limit=3)
+                sample_results = gist_centroids_collection.get(limit=3, include=["metadatas"])
                 if sample_results['metadatas']:
                     sample_files = []
                     for meta in sample_results['metadatas']:
@@ -2463,17 +3157,16 @@ def get_sync_status():
         
         sync_status = sync_tracker.get_sync_status(chunking_mode)
         
-        # Debug the persistent file
-        if sync_status.get('total_changes', 0) > 0:
-            print(f"PERSISTENT SYNC QUEUE for {chunking_mode}:")
+        # Debug the persistent file; the UI polls this endpoint, so the per-file
+        # stat/hash dump only runs when debug logging is enabled
+        if sync_status.get('total_changes', 0) > 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Persistent sync queue for %s:", chunking_mode)
             files_to_sync = sync_tracker.get_files_to_sync(chunking_mode)
             for i, file_event in enumerate(files_to_sync):
-                print(f"  File {i+1}: {os.path.basename(file_event.file_path)} ({file_event.event_type})")
-                print(f"    Full path: {file_event.file_path}")
-                print(f"    Exists: {os.path.exists(file_event.file_path)}")
-                if os.path.exists(file_event.file_path):
-                    needs_indexing = not metadata_tracker.is_file_unchanged(file_event.file_path, chunking_mode)
-                    print(f"    Needs indexing: {needs_indexing}")
+                exists = os.path.exists(file_event.file_path)
+                needs_indexing = exists and not metadata_tracker.is_file_unchanged(file_event.file_path, chunking_mode)
+                logger.debug("  File %d: %s (%s) exists: %s, needs indexing: %s", i + 1, file_event.file_path,
+                             file_event.event_type, exists, needs_indexing)
         
         return jsonify({
             'success': True,
@@ -2488,12 +3181,12 @@ def get_sync_status():
 def start_realtime_sync():
     """Start real-time file monitoring"""
     try:
-        print("DEBUG API: Starting real-time sync monitoring...")
+        logger.debug("Starting real-time sync monitoring...")
         
         # Start the monitor
-        print("DEBUG API: Calling realtime_monitor.start_monitoring()...")
+        logger.debug("Calling realtime_monitor.start_monitoring()...")
         success = realtime_monitor.start_monitoring()
-        print(f"DEBUG API: start_monitoring returned: {success}")
+        logger.debug("start_monitoring returned: %s", success)
         
         if success:
             # Setup UI callback for real-time updates
@@ -2502,23 +3195,23 @@ def start_realtime_sync():
                 # For now, we'll just log the update
                 pass
             
-            print("DEBUG API: Setting sync status callback...")
+            logger.debug("Setting sync status callback...")
             sync_tracker.set_sync_status_callback(notify_ui_update)
             
             # Add any existing indexed folders to monitoring
-            print("DEBUG API: Calling setup_initial_monitoring()...")
+            logger.debug("Calling setup_initial_monitoring()...")
             setup_initial_monitoring()
             
-            print("DEBUG API: Getting monitor status...")
+            logger.debug("Getting monitor status...")
             status = realtime_monitor.get_status()
-            print(f"DEBUG API: Monitor status: {status}")
+            logger.debug("Monitor status: %s", status)
             
             response = {
                 "success": True,
                 "message": "Real-time sync monitoring started",
                 "status": status
             }
-            print(f"SUCCESS API: Returning success response: {response}")
+            logger.debug("Returning success response: %s", response)
             return jsonify(response)
         else:
             error_msg = "Failed to start monitoring"
@@ -2526,7 +3219,6 @@ def start_realtime_sync():
             return jsonify({"success": False, "error": error_msg}), 500
             
     except Exception as e:
-        import traceback
         error_msg = str(e)
         traceback_str = traceback.format_exc()
         print(f"ERROR API: Exception in start_realtime_sync: {error_msg}")
@@ -2566,11 +3258,7 @@ def execute_sync():
             })
         
         # Start background sync
-        threading.Thread(
-            target=execute_sync_background,
-            args=[files_to_sync, chunking_mode],
-            daemon=True
-        ).start()
+        submit_background(execute_sync_background, files_to_sync, chunking_mode)
         
         return jsonify({
             "success": True,
@@ -2661,7 +3349,6 @@ def test_simple():
             "monitor_running": realtime_monitor.is_running if hasattr(realtime_monitor, 'is_running') else "unknown"
         })
     except Exception as e:
-        import traceback
         return jsonify({
             "success": False, 
             "error": str(e),
@@ -2687,7 +3374,6 @@ def debug_sync_queue():
         })
         
     except Exception as e:
-        import traceback
         return jsonify({
             "success": False, 
             "error": str(e),
@@ -2736,7 +3422,7 @@ def debug_sync_events():
 def force_rescan_folders():
     """Force rescan all monitored folders for changes"""
     try:
-        print("DEBUG: Manual force rescan triggered...")
+        logger.debug("Manual force rescan triggered...")
         realtime_monitor.force_check_all_folders()
         
         # Get updated sync status for both modes
@@ -2785,15 +3471,15 @@ def get_current_sync_queue():
 def setup_initial_monitoring():
     """Setup monitoring for folders that are already indexed"""
     try:
-        print("DEBUG: Setting up initial monitoring...")
+        logger.debug("Setting up initial monitoring...")
         
         # Get indexed folders from metadata
         indexed_folders = metadata_tracker.get_indexed_folders()
-        print(f"DEBUG: Found {len(indexed_folders)} indexed folders: {list(indexed_folders.keys())}")
+        logger.debug("Found %d indexed folders: %s", len(indexed_folders), list(indexed_folders))
         
         added_count = 0
         for folder_path, folder_info in indexed_folders.items():
-            print(f"DEBUG: folder: {folder_path} with modes: {folder_info['chunking_modes']}")
+            logger.debug("folder: %s with modes: %s", folder_path, folder_info['chunking_modes'])
             for chunking_mode in folder_info['chunking_modes']:
                 success = realtime_monitor.add_folder(folder_path, chunking_mode)
                 if success:
@@ -2802,16 +3488,15 @@ def setup_initial_monitoring():
                 else:
                     print(f"ERROR: Failed to add {folder_path} for {chunking_mode} mode")
         
-        print(f"DEBUG: Total folders added to monitoring: {added_count}")
+        logger.debug("Total folders added to monitoring: %d", added_count)
         
         # Force check for any changes since last run
-        print("DEBUG: Force checking all folders for changes...")
+        logger.debug("Force checking all folders for changes...")
         realtime_monitor.force_check_all_folders()
         print("SUCCESS: Initial monitoring setup complete!")
         
     except Exception as e:
         print(f"ERROR: Error setting up initial monitoring: {e}")
-        import traceback
         traceback.print_exc()
 
 def execute_sync_background(files_to_sync, chunking_mode):
@@ -2849,70 +3534,142 @@ def execute_sync_background(files_to_sync, chunking_mode):
         
         synced_files = []
         
-        for i, file_event in enumerate(files_to_sync):
-            # Check for cancellation
-            if indexing_status["cancel_requested"]:
-                print(f"Sync cancelled at file {i}/{len(files_to_sync)}")
-                raise Exception("Sync cancelled by user")
-            
+        # Text extraction and chunking of created/modified files runs ahead on the extract
+        # pool, in queue order
+        extract_workers = EXTRACT_WORKERS or (os.cpu_count() or 1)
+        extract_pool = make_extract_pool(extract_workers, "sync-extract")
+        prepared_updates = {}
+        update_indices = [i for i, file_event in enumerate(files_to_sync)
+                          if file_event.event_type in ('created', 'modified')]
+        next_update = 0
+        
+        def prepare_updates_until(limit_index):
+            nonlocal next_update
+            while next_update < len(update_indices) and update_indices[next_update] <= limit_index:
+                update_path = files_to_sync[update_indices[next_update]].file_path
+                if update_path not in prepared_updates and os.path.exists(update_path):
+                    prepared_updates[update_path] = extract_pool.submit(
+                        extract_chunks_for_update, update_path, chunking_function
+                    )
+                next_update += 1
+        
+        # Chunks of all deleted files are removed up front with batched $in deletes;
+        # their per-file step below then only has to clear metadata
+        deleted_paths = [file_event.file_path for file_event in files_to_sync if file_event.event_type == 'deleted']
+        deletions_batched = False
+        if deleted_paths:
+            try:
+                removed = delete_chunks_where_in(collection, "path", deleted_paths)
+                logger.debug("Deleted %d chunks for %d removed files", removed, len(deleted_paths))
+                deletions_batched = True
+            except Exception as e:
+                print(f"Batched delete failed, deleting files one by one: {e}")
+        
+        # Each change is applied on a sync worker, so several files wait on the shared
+        # embedding batcher (and get encoded together) at once; results are tallied
+        # in queue order on this thread, so counters need no locking
+        sync_workers = max(1, SYNC_WORKERS)
+        sync_pool = ThreadPoolExecutor(max_workers=sync_workers, thread_name_prefix="sync")
+        in_flight = deque()
+        
+        def sync_one(file_event, prepared):
+            """Apply one queued change; returns (success, failure reason), None for unknown events"""
             file_path = file_event.file_path
             event_type = file_event.event_type
-            
-            # Determine operation type for better UI feedback
             if event_type == 'deleted':
-                operation = "Removing"
-            elif event_type == 'created':
-                operation = "Adding"
-            elif event_type == 'modified':
-                operation = "Updating"
-            else:
-                operation = "working on"
-            
-            indexing_status.update({
-                "progress": (i / len(files_to_sync)) * 100,
-                "current_file": os.path.basename(file_path),
-                "message": f"{operation} {os.path.basename(file_path)}..."
-            })
-            
-            try:
-                if event_type == 'deleted':
-                    print(f"SYNC DEBUG: deleting {os.path.basename(file_path)}")
-                    print(f"🗑️ SYNC DEBUG: File still exists: {os.path.exists(file_path)}")
-                    success = _handle_file_deletion(file_path, chunking_mode, collection)
-                    if success:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("deleting %s (still exists: %s)", file_path, os.path.exists(file_path))
+                return _handle_file_deletion(file_path, chunking_mode, collection, deletions_batched), "deletion_failed"
+            if event_type in ['created', 'modified']:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s %s (exists: %s)", event_type, file_path, os.path.exists(file_path))
+                success = _handle_file_update(file_path, chunking_mode, collection, chunking_function, prepared)
+                logger.debug("Update result: %s", success)
+                return success, "update_failed"
+            return None, None
+        
+        def drain_synced(limit):
+            """Tally finished changes in queue order until at most `limit` are pending"""
+            nonlocal files_processed, files_deleted, files_updated, files_failed
+            while len(in_flight) > limit:
+                file_event, sync_future = in_flight.popleft()
+                file_path = file_event.file_path
+                try:
+                    success, failure = sync_future.result()
+                except Exception as e:
+                    files_failed += 1
+                    failed_files.append((file_path, str(e)))
+                    print(f"ERROR: Error processing {file_path}: {e}")
+                    continue
+                
+                if success:
+                    synced_files.append(file_path)
+                    if file_event.event_type == 'deleted':
                         files_deleted += 1
-                        synced_files.append(file_path)
                         print(f"SUCCESS: Deleted file: {os.path.basename(file_path)}")
                     else:
-                        files_failed += 1
-                        failed_files.append((file_path, "deletion_failed"))
-                
-                elif event_type in ['created', 'modified']:
-                    print(f"SYNC DEBUG: {event_type} {os.path.basename(file_path)}")
-                    print(f"🔧 SYNC DEBUG: File exists: {os.path.exists(file_path)}")
-                    success = _handle_file_update(file_path, chunking_mode, collection, chunking_function)
-                    print(f"🔧 SYNC DEBUG: Update result: {success}")
-                    if success:
                         files_updated += 1
-                        synced_files.append(file_path)
                         print(f"SUCCESS: Updated file: {os.path.basename(file_path)}")
-                    else:
-                        files_failed += 1
-                        failed_files.append((file_path, "update_failed"))
-                        print(f"❌ SYNC DEBUG: Update FAILED for {os.path.basename(file_path)}")
+                elif success is not None:
+                    files_failed += 1
+                    failed_files.append((file_path, failure))
+                    logger.debug("%s FAILED for %s", file_event.event_type, os.path.basename(file_path))
                 
                 files_processed += 1
+        
+        # Metadata changes are saved to the sidecar once, after the loop
+        metadata_tracker.begin_bulk()
+        try:
+            for i, file_event in enumerate(files_to_sync):
+                # Check for cancellation
+                if indexing_status["cancel_requested"]:
+                    print(f"Sync cancelled at file {i}/{len(files_to_sync)}")
+                    for pending in prepared_updates.values():
+                        pending.cancel()
+                    extract_pool.shutdown(wait=False)
+                    # Let changes already running finish before the rollback sees the collection
+                    sync_pool.shutdown(wait=True, cancel_futures=True)
+                    raise Exception("Sync cancelled by user")
+            
+                # Keep up to two batches of upcoming files extracting in the background
+                prepare_updates_until(i + 2 * extract_workers)
+            
+                file_path = file_event.file_path
+                event_type = file_event.event_type
+            
+                # Determine operation type for better UI feedback
+                if event_type == 'deleted':
+                    operation = "Removing"
+                elif event_type == 'created':
+                    operation = "Adding"
+                elif event_type == 'modified':
+                    operation = "Updating"
+                else:
+                    operation = "working on"
+            
+                bname = os.path.basename(file_path)
+                indexing_status.update({
+                    "progress": (i / len(files_to_sync)) * 100,
+                    "current_file": bname,
+                    "message": f"{operation} {bname}..."
+                })
                 
-            except Exception as e:
-                files_failed += 1
-                failed_files.append((file_path, str(e)))
-                print(f"ERROR: Error processing {file_path}: {e}")
-                continue
+                in_flight.append((file_event, sync_pool.submit(sync_one, file_event,
+                                                               prepared_updates.pop(file_path, None))))
+                drain_synced(2 * sync_workers)
+            
+            drain_synced(0)
+        finally:
+            # No worker may still be writing when the sidecar is saved or the job ends
+            sync_pool.shutdown(wait=True, cancel_futures=True)
+            metadata_tracker.commit_bulk()
+        
+        extract_pool.shutdown(wait=False)
         
         # Mark successfully processed files as synced and remove failed files from queue
         if synced_files:
             sync_tracker.mark_files_synced(synced_files, chunking_mode)
-            print(f"DEBUG: Marked {len(synced_files)} files as synced in {chunking_mode} mode")
+            logger.debug("Marked %d files as synced in %s mode", len(synced_files), chunking_mode)
         
         # Remove failed files from queue so they don't stay stuck forever
         if failed_files:
@@ -2927,7 +3684,7 @@ def execute_sync_background(files_to_sync, chunking_mode):
                         break
         
         # CRITICAL FIX: Prevent cross-mode interference by ensuring we only clear our own queue
-        print(f"DEBUG: Final queue check for {chunking_mode} mode - ensuring no cross-mode interference")
+        logger.debug("Final queue check for %s mode - ensuring no cross-mode interference", chunking_mode)
         
         # Validate sync completion by checking queue status
         remaining_count = len(sync_tracker.get_files_to_sync(chunking_mode))
@@ -2995,7 +3752,6 @@ def execute_sync_background(files_to_sync, chunking_mode):
         else:
             # Other error
             print(f"Fatal sync error: {e}")
-            import traceback
             traceback.print_exc()
             
             # Don't clear entire queue on error
@@ -3007,18 +3763,23 @@ def execute_sync_background(files_to_sync, chunking_mode):
                 "chunking_mode": chunking_mode,
             })
 
-def _handle_file_deletion(file_path: str, chunking_mode: str, collection) -> bool:
-    """Handle file deletion with proper cleanup for specific chunking mode"""
+def _handle_file_deletion(file_path: str, chunking_mode: str, collection, chunks_removed: bool = False) -> bool:
+    """
+    Handle file deletion with proper cleanup for specific chunking mode.
+    chunks_removed is set when the caller already deleted the file's chunks in a batch.
+    """
     try:
-        print(f"🗑️ DELETING: {os.path.basename(file_path)} from {chunking_mode} mode")
+        logger.debug("Deleting %s from %s mode", file_path, chunking_mode)
         
         # Remove from ChromaDB for this specific mode
-        existing_results = collection.get(where={"path": file_path})
-        if existing_results['ids']:
-            collection.delete(ids=existing_results['ids'])
-            print(f"Deleted {len(existing_results['ids'])} chunks from ChromaDB")
-        else:
-            print(f"No chunks found in ChromaDB for {os.path.basename(file_path)}")
+        if not chunks_removed:
+            existing_results = collection.get(where={"path": file_path}, include=[])
+            if existing_results['ids']:
+                with chroma_write_lock:
+                    collection.delete(ids=existing_results['ids'])
+                logger.debug("Deleted %d chunks from ChromaDB", len(existing_results['ids']))
+            else:
+                logger.debug("No chunks found in ChromaDB for %s", file_path)
         
         # Remove from metadata for this specific mode
         # Check if file exists in other modes before full removal
@@ -3036,11 +3797,11 @@ def _handle_file_deletion(file_path: str, chunking_mode: str, collection) -> boo
             if other_modes_exist:
                 # Remove only this mode's metadata
                 metadata_tracker.remove_file_metadata(file_path, chunking_mode)
-                print(f"Removed {chunking_mode} mode metadata (file exists in other modes)")
+                logger.debug("Removed %s mode metadata (file exists in other modes)", chunking_mode)
             else:
                 # Remove entire file metadata
                 metadata_tracker.remove_file_metadata(file_path)
-                print(f"Removed all metadata for {os.path.basename(file_path)}")
+                logger.debug("Removed all metadata for %s", file_path)
         
         return True
         
@@ -3048,139 +3809,87 @@ def _handle_file_deletion(file_path: str, chunking_mode: str, collection) -> boo
         print(f"Error deleting file {file_path}: {e}")
         return False
 
-def _handle_file_update(file_path: str, chunking_mode: str, collection, chunking_function) -> bool:
-    """Handle file update with simple delete-and-reindex approach"""
+def _handle_file_update(file_path: str, chunking_mode: str, collection, chunking_function, prepared=None) -> bool:
+    """
+    Handle file update with simple delete-and-reindex approach.
+    prepared is an optional future resolving to the file's chunks (see extract_chunks_for_update).
+    """
     try:
         if not os.path.exists(file_path):
             print(f"File {file_path} no longer exists, skipping update")
             return False
         
-        print(f"🔄 UPDATING: {os.path.basename(file_path)} - using delete-and-reindex approach")
+        logger.debug("Updating %s (delete and reindex)", file_path)
+        fname = os.path.basename(file_path)
+        file_ext = os.path.splitext(fname)[1].lower()
         
         # STEP 1: Delete ALL existing chunks for this file (comprehensive deletion)
-        print(f"🗑️ STEP 1: Deleting existing chunks for {os.path.basename(file_path)}")
-        
         total_deleted = 0
-        paths_to_try = [
+        paths_to_try = list(dict.fromkeys([
             file_path,
             os.path.normpath(file_path),
             os.path.abspath(file_path)
-        ]
+        ]))
         
-        # Try all possible path variations
-        for path_variant in paths_to_try:
-            try:
-                existing_results = collection.get(where={"path": path_variant})
-                if existing_results['ids']:
-                    print(f"  Found {len(existing_results['ids'])} chunks with path: {path_variant}")
+        # Look up all path variations with one query
+        try:
+            existing_results = collection.get(where={"path": {"$in": paths_to_try}}, include=[])
+            if existing_results['ids']:
+                logger.debug("Found %d existing chunks for %s", len(existing_results['ids']), file_path)
+                with chroma_write_lock:
                     collection.delete(ids=existing_results['ids'])
-                    total_deleted += len(existing_results['ids'])
-            except Exception as e:
-                print(f"  Error deleting chunks for path {path_variant}: {e}")
+                total_deleted += len(existing_results['ids'])
+        except Exception as e:
+            print(f"  Error deleting chunks for path {file_path}: {e}")
         
-        # Also try to delete by filename pattern (in case there are ID conflicts)
+        # Fall back to the filename (in case the stored path differs) only if nothing matched
         try:
-            fname = os.path.basename(file_path)
-            filename_results = collection.get(where={"fname": fname})
-            if filename_results['ids']:
+            filename_results = (collection.get(where={"fname": fname}, include=["metadatas"])
+                                if total_deleted == 0 else None)
+            if filename_results and filename_results['ids']:
                 # Filter to only delete chunks that actually match our file path
-                ids_to_delete = []
-                for i, metadata in enumerate(filename_results['metadatas']):
-                    if metadata and metadata.get('path') in paths_to_try:
-                        ids_to_delete.append(filename_results['ids'][i])
+                paths_set = frozenset(paths_to_try)
+                ids_to_delete = [chunk_id for chunk_id, metadata
+                                 in zip(filename_results['ids'], filename_results['metadatas'])
+                                 if metadata and metadata.get('path') in paths_set]
                 
                 if ids_to_delete:
-                    print(f"  Found {len(ids_to_delete)} additional chunks by filename")
-                    collection.delete(ids=ids_to_delete)
+                    logger.debug("Found %d additional chunks by filename", len(ids_to_delete))
+                    with chroma_write_lock:
+                        collection.delete(ids=ids_to_delete)
                     total_deleted += len(ids_to_delete)
         except Exception as e:
             print(f"  Error deleting by filename: {e}")
         
-        print(f"✅ TOTAL DELETED: {total_deleted} old chunks for {os.path.basename(file_path)}")
-        
-        # Verify deletion worked
-        verification_results = collection.get(where={"path": file_path})
-        remaining_chunks = len(verification_results['ids']) if verification_results['ids'] else 0
-        if remaining_chunks > 0:
-            print(f"⚠️ WARNING: {remaining_chunks} chunks still remain after deletion attempt!")
-        else:
-            print(f"✅ CONFIRMED: All old chunks deleted successfully")
+        logger.debug("Deleted %d old chunks for %s", total_deleted, file_path)
         
         # Skip centroid deletion in simplified gist mode
         
         # STEP 2: Reindex the file as if it's new
-        print(f"📝 STEP 2: Reindexing {os.path.basename(file_path)} as new file")
-        
-        # Extract content
-        print(f"📄 Extracting content from {os.path.basename(file_path)}...")
-        content = extract_text(file_path)
-        if not content.strip():
-            print(f"⚠️ WARNING: File {file_path} extracted no content, using placeholder")
-            content = f"[Empty or unreadable content from {os.path.basename(file_path)}]"
-        else:
-            print(f"✅ Extracted {len(content)} characters from {os.path.basename(file_path)}")
-        
-        file_ext = os.path.splitext(file_path)[1].lower()
-        
-        # Create chunks
-        print(f"✂️ Creating chunks using {chunking_function.__name__} for {os.path.basename(file_path)}...")
-        chunks = chunking_function(content, file_ext)
-        if not chunks:
-            print(f"⚠️ WARNING: No chunks created for {file_path}, creating fallback")
-            chunks = [(content[:1000] if content else f"[Fallback content for {os.path.basename(file_path)}]", [1])]
-        else:
-            print(f"✅ Created {len(chunks)} chunks for {os.path.basename(file_path)}")
+        # Extract and chunk content (possibly already done by a sync worker)
+        chunks = prepared.result() if prepared is not None else extract_chunks_for_update(file_path, chunking_function)
         
-        # Add new chunks
-        current_model = get_model_for_mode(chunking_mode)
-        chunk_embeddings = []
+        # Add new chunks: one batched encode, then one batched write
+        documents, metadatas, ids = build_chunk_records(file_path, file_ext, chunking_mode, chunks)
         chunks_added = 0
         
-        for chunk_idx, (chunk_text, line_ranges) in enumerate(chunks):
-            try:
-                embedding = current_model.encode(chunk_text)
-                
-                if chunking_mode == 'gist':
-                    from main import normalize_embedding
-                    normalized_embedding = normalize_embedding(embedding)
-                    chunk_embeddings.append(normalized_embedding)
-                
-                unique_id = f"{chunking_mode}-{file_path}-{chunk_idx+1}"
-                
-                print(f"  Adding chunk {chunk_idx+1}/{len(chunks)}: {len(chunk_text)} chars, ID: {unique_id[:50]}...")
-                
-                collection.add(
-                    embeddings=[embedding],
-                    documents=[chunk_text],
-                    metadatas=[{
-                        "path": file_path,
-                        "fname": os.path.basename(file_path),
-                        "file_type": file_ext,
-                        "chunk_id": chunk_idx + 1,
-                        "chunk_index": chunk_idx + 1,
-                        "line_ranges": str(line_ranges),
-                        "chunk_size": len(line_ranges),
-                        "chunking_mode": chunking_mode,
-                    }],
-                    ids=[unique_id]
-                )
-                chunks_added += 1
-                print(f"  ✅ Successfully added chunk {chunk_idx+1}")
-                
-            except Exception as e:
-                print(f"❌ ERROR: Failed to add chunk {chunk_idx+1} for {os.path.basename(file_path)}: {e}")
-                import traceback
-                traceback.print_exc()
-                # Don't raise - continue with other chunks but return False at the end
-                print(f"Continuing with remaining chunks...")
-                continue
+        try:
+            embeddings = get_batcher_for_mode(chunking_mode).encode(documents)
+            with chroma_write_lock:
+                chunks_added = add_chunks_bisecting(collection, embeddings, documents, metadatas, ids)
+        except Exception as e:
+            print(f"❌ ERROR: Failed to add chunks for {fname}: {e}")
+            traceback.print_exc()
         
-        print(f"📊 SUMMARY: Added {chunks_added}/{len(chunks)} chunks for {os.path.basename(file_path)}")
+        logger.debug("Added %d/%d chunks for %s", chunks_added, len(chunks), file_path)
         
-        # Verify chunks were actually added to ChromaDB
-        verification_results = collection.get(where={"path": file_path})
-        actual_chunks_in_db = len(verification_results['ids']) if verification_results['ids'] else 0
-        print(f"🔍 VERIFICATION: {actual_chunks_in_db} chunks now in ChromaDB for {os.path.basename(file_path)}")
+        # add_chunks_bisecting reports how many chunks were written; re-reading them
+        # from ChromaDB is only done when debugging
+        actual_chunks_in_db = chunks_added
+        if logger.isEnabledFor(logging.DEBUG):
+            verification_results = collection.get(where={"path": file_path}, include=[])
+            actual_chunks_in_db = len(verification_results['ids']) if verification_results['ids'] else 0
+            logger.debug("Verification: %d chunks now in ChromaDB for %s", actual_chunks_in_db, file_path)
         
         if chunks_added == 0 or actual_chunks_in_db == 0:
             print(f"❌ CRITICAL ERROR: No chunks were successfully added to ChromaDB!")
@@ -3198,21 +3907,21 @@ def _handle_file_update(file_path: str, chunking_mode: str, collection, chunking
         if actual_chunks_in_db != len(chunks):
             print(f"⚠️ WARNING: Expected {len(chunks)} chunks but found {actual_chunks_in_db} in DB")
         
-        print(f"🎉 SUCCESS: File {os.path.basename(file_path)} updated successfully - {actual_chunks_in_db} chunks in DB")
+        logger.debug("Updated %s: %d chunks in DB", file_path, actual_chunks_in_db)
         return True
         
     except Exception as e:
         print(f"❌ CRITICAL ERROR: Failed to update file {file_path}: {e}")
-        import traceback
         traceback.print_exc()
         
         # Try to verify if the file still has chunks in DB after the error
-        try:
-            verification_results = collection.get(where={"path": file_path})
-            chunks_in_db = len(verification_results['ids']) if verification_results['ids'] else 0
-            print(f"🔍 POST-ERROR VERIFICATION: {chunks_in_db} chunks remain in ChromaDB for {os.path.basename(file_path)}")
-        except:
-            print(f"⚠️ Could not verify ChromaDB state after error")
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                verification_results = collection.get(where={"path": file_path}, include=[])
+                chunks_in_db = len(verification_results['ids']) if verification_results['ids'] else 0
+                logger.debug("Post-error verification: %d chunks remain in ChromaDB for %s", chunks_in_db, file_path)
+            except Exception:
+                logger.debug("Could not verify ChromaDB state after error")
         
         return False
 
@@ -3224,16 +3933,12 @@ def index_folders_internal(folders, chunking_mode='gist', custom_excludes=None,
     """Internal helper for indexing folders synchronously"""
     try:
         # Run indexing in a background thread and wait for completion
-        import threading
-        import time
-        
         # Start indexing
         thread = threading.Thread(target=index_folders_background, args=(folders, chunking_mode, custom_excludes, max_size_mb))
         thread.start()
         
-        # Wait for completion (check every second)
-        while thread.is_alive():
-            time.sleep(1)
+        # Wait for completion; cancellation is handled inside index_folders_background
+        thread.join()
             
         # Check if indexing was successful
         if indexing_status["is_indexing"]:
@@ -3290,13 +3995,12 @@ def github_get_repos():
     try:
         data = request.get_json() or {}
         page = data.get('page', 1)
-        print(f"DEBUG: API github_get_repos called with page: {page}")
+        logger.debug("API github_get_repos called with page: %s", page)
         result = github_integration.get_repositories(page)
-        print(f"DEBUG: API github_get_repos result: {result}")
+        logger.debug("API github_get_repos result: %s", result)
         return jsonify(result)
     except Exception as e:
-        print(f"DEBUG: API github_get_repos exception: {e}")
-        import traceback
+        print(f"Error in github_get_repos: {e}")
         traceback.print_exc()
         return jsonify({"repos": [], "has_more": False, "total_count": 0, "error": str(e)}), 500
 
@@ -3480,7 +4184,6 @@ def github_checkout_branch():
             if updated:
                 # Save updated configuration
                 try:
-                    import json
                     with open(github_integration.connected_repos_file, 'w') as f:
                         json.dump(connected_repos, f, indent=2)
                     print(f"✅ Updated active branch for {full_name} to {branch_name}")
@@ -3563,11 +4266,8 @@ def github_index_repo():
         # GitHub repos are indexed with gh:// prefixed IDs and don't use the metadata tracker
         
         # Repository indexing with custom exclusions and size limits
-        print(f"DEBUG: Starting background indexing for repository {full_name} with:")
-        print(f"  - Mode: {mode}")
-        print(f"  - Branch: {branch}")
-        print(f"  - Excludes: {excludes}")
-        print(f"  - Max file size: {max_size_mb}MB")
+        logger.debug("Starting background indexing for repository %s (mode: %s, branch: %s, excludes: %s, max file size: %sMB)",
+                     full_name, mode, branch, excludes, max_size_mb)
         
         # Update repository status to indexing
         github_integration.update_repo_status(full_name, "indexing")
@@ -3626,7 +4326,6 @@ def github_index_repo():
                     except Exception as e:
                         error_msg = f"{current_mode.title()} indexing failed: {str(e)}"
                         print(f"🚀 THREAD ERROR: {error_msg}")
-                        import traceback
                         traceback.print_exc()
                         github_integration.update_repo_status(full_name, "index_failed", error_msg)
                         indexing_status.update({
@@ -3668,7 +4367,6 @@ def github_index_repo():
                 # Handle any unexpected errors
                 error_msg = f"Indexing failed: {str(e)}"
                 print(f"🚀 THREAD OUTER ERROR: {error_msg}")
-                import traceback
                 traceback.print_exc()
                 github_integration.update_repo_status(full_name, "index_failed", error_msg)
                 indexing_status.update({
@@ -3751,14 +4449,9 @@ def github_sync_repo():
             def run_sync():
                 try:
                     for mode in modes:
-                        # Delete chunks for removed files
-                        for file_path in removed_files:
-                            delete_github_file_chunks(full_name, branch, file_path, mode)
-                        
-                        # Delete and re-index modified files
-                        for file_path in modified_files:
-                            delete_github_file_chunks(full_name, branch, file_path, mode)
-                            # File will be re-indexed with added files
+                        # Delete chunks for removed files, and for modified files
+                        # which will be re-indexed with the added files
+                        delete_github_file_chunks(full_name, branch, removed_files + modified_files, mode)
                         
                         # Index added and modified files
                         files_to_index = added_files + modified_files
@@ -3987,7 +4680,7 @@ def delete_branch_index():
                             {"branch": {"$eq": branch}}
                         ]
                     },
-                    include=["ids"]
+                    include=[]
                 )
                 
                 chunk_ids = results.get("ids", [])
@@ -4009,7 +4702,7 @@ def delete_branch_index():
                             {"branch": {"$eq": branch}}
                         ]
                     },
-                    include=["ids"]
+                    include=[]
                 )
                 
                 chunk_ids = results.get("ids", [])
@@ -4082,7 +4775,7 @@ def get_branch_index_status():
                                 {"branch": {"$eq": branch}}
                             ]
                         },
-                        include=["ids"]
+                        include=[]
                     )
                     chunk_counts["gist"] = len(count_results.get("ids", []))
             except Exception as e:
@@ -4111,7 +4804,7 @@ def get_branch_index_status():
                                 {"branch": {"$eq": branch}}
                             ]
                         },
-                        include=["ids"]
+                        include=[]
                     )
                     chunk_counts["pinpoint"] = len(count_results.get("ids", []))
             except Exception as e:
@@ -4338,5 +5031,19 @@ if __name__ == '__main__':
     print(f"Database directory: {metadata_tracker.get_db_directory()}")
     print(f"Granular chunking: {ENABLE_GRANULAR_CHUNKING}")
     
-    # Run the Flask app
-    app.run(host='0.0.0.0', port=5001, debug=False) 
\ No newline at end of file
+    # Load models in the background so the HTTP port binds immediately
+    threading.Thread(target=warm_up_models, name="model-warmup", daemon=True).start()
+    
+    # Run the Flask app on a multi-threaded production WSGI server when available,
+    # so status/health polling is never queued behind a long search or index request
+    try:
+        from waitress import serve
+        WAITRESS_AVAILABLE = True
+    except ImportError:
+        WAITRESS_AVAILABLE = False
+    
+    if WAITRESS_AVAILABLE:
+        print(f"Serving with waitress ({API_SERVER_THREADS} threads)")
+        serve(app, host='0.0.0.0', port=5001, threads=API_SERVER_THREADS)
+    else:
+        app.run(host='0.0.0.0', port=5001, debug=False, threaded=True) 
\ No newline at end of file
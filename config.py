@@ -87,6 +87,12 @@ GIST_BM25_B = 0.75     # Length normalization parameter
 # Result formatting
 GIST_EXCERPT_MAX_LENGTH = 600  # Maximum characters for best chunk excerpt
 
+# Optional cross-encoder reranking of the best gist results, e.g.
+# "cross-encoder/ms-marco-MiniLM-L-6-v2" ("" = off). Only the top
+# GIST_RERANK_TOP_K files are rescored, reordering them by the cross-encoder
+GIST_RERANK_MODEL = ""
+GIST_RERANK_TOP_K = 50
+
 # Debug and telemetry
 GIST_DEBUG_SCORING = False     # Include component scores in response
 GIST_LOG_SCORE_DISTRIBUTION = True  # Log score statistics
@@ -114,6 +120,10 @@ MAX_CHUNK_DISPLAY_LENGTH = 200
 # Enable/disable debug output during search
 SHOW_DEBUG_OUTPUT = False
 
+# Log level for internal diagnostics ("DEBUG", "INFO", "WARNING", ...)
+# Can be overridden with the FILEHAWK_LOG_LEVEL environment variable
+LOG_LEVEL = "INFO"
+
 # Enable/disable loading animations
 SHOW_LOADING_ANIMATIONS = True
 
@@ -136,6 +146,19 @@ SKIP_SYSTEM_FILES = True
 # Maximum file size to process (in MB, 0 = no limit)
 MAX_FILE_SIZE_MB = 50
 
+# Extensions that are never text; files without a dedicated parser are skipped
+# by extension before being opened
+BINARY_FILE_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tif', '.tiff', '.psd',
+    '.mp3', '.wav', '.flac', '.ogg', '.mp4', '.mov', '.avi', '.mkv', '.webm',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.tar', '.jar', '.whl',
+    '.exe', '.dll', '.so', '.dylib', '.o', '.a', '.lib', '.bin', '.class', '.pyc',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot', '.sqlite', '.db', '.iso', '.dmg',
+})
+
+# Bytes read from the start of other files to detect binary content (NUL bytes)
+BINARY_SNIFF_BYTES = 8192
+
 # ============================================================================
 # ADVANCED SETTINGS
 # ============================================================================
@@ -152,4 +175,99 @@ MIN_CONTENT_LENGTH = 10
 
 # Maximum number of results to retrieve from ChromaDB
 # (internal setting, affects performance)
-MAX_SEARCH_RESULTS = 100
\ No newline at end of file
+MAX_SEARCH_RESULTS = 100
+
+# Worker threads for the API server when served by waitress (pip install waitress)
+API_SERVER_THREADS = 8
+
+# Device for the embedding models: "auto" (CUDA, then Apple MPS, then CPU),
+# or an explicit torch device such as "cpu", "cuda", "cuda:1", "mps".
+# The FILEHAWK_DEVICE environment variable overrides this (e.g. to force CPU)
+EMBEDDING_DEVICE = "auto"
+
+# Inference backend for the embedding models
+# "torch": default PyTorch FP32 inference
+# "onnx" / "openvino": optimized runtimes (needs sentence-transformers>=3.2 and
+#   pip install "sentence-transformers[onnx]" or "sentence-transformers[openvino]")
+# Falls back to "torch" if the backend cannot be loaded
+EMBEDDING_BACKEND = "torch"
+
+# Reduced precision for the "torch" backend: dynamic int8 quantization of the
+# Linear layers when running on CPU, and float16 weights on CUDA GPUs
+EMBEDDING_TORCH_INT8_CPU = False
+EMBEDDING_TORCH_FP16_GPU = False
+
+# Optional model file for the onnx/openvino backend, e.g. an int8 export such as
+# "onnx/model_qint8_avx512_vnni.onnx" (empty = backend default model file)
+EMBEDDING_BACKEND_FILE = ""
+
+# Dynamic int8 quantization for the "onnx" backend when EMBEDDING_BACKEND_FILE is empty:
+# "" (off), "avx512_vnni", "avx512", "avx2" or "arm64". The quantized model is exported
+# once into the app data directory and reused on later starts
+EMBEDDING_ONNX_QUANTIZATION = ""
+
+# Number of chunks encoded per forward pass of the embedding model
+# Larger batches = better CPU/GPU utilization but more memory per call
+EMBEDDING_BATCH_SIZE = 32
+
+# Cross-file embedding batcher: requests from different files are merged
+# until EMBEDDING_MAX_BATCH texts are pending or EMBEDDING_MAX_WAIT_MS elapses
+EMBEDDING_MAX_BATCH = 256
+EMBEDDING_MAX_WAIT_MS = 10
+EMBEDDING_QUEUE_SIZE = 512
+
+# Number of recently encoded texts (chunks and queries) kept in memory so
+# duplicates skip the embedding model; 0 disables the cache
+EMBEDDING_CACHE_SIZE = 4096
+
+# Number of recent search queries whose embeddings are kept per model, so
+# repeated searches (paging, re-running a query) skip the encoder
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# Worker threads used for text extraction and chunking during indexing
+# 0 = use the number of CPU cores
+EXTRACT_WORKERS = 0
+
+# GitHub repositories with at most this many files are extracted inline
+# instead of on the worker pool
+EXTRACT_PARALLEL_MIN_FILES = 50
+
+# Worker threads shared by background reindex and sync jobs started from the API;
+# further requests queue until a worker is free
+BACKGROUND_WORKERS = 4
+
+# Files a sync run updates/deletes concurrently; their encodes are merged by the
+# embedding batcher. 1 applies queued changes strictly one after another
+SYNC_WORKERS = 4
+
+# Minimum seconds between indexing progress updates in the status dict
+STATUS_UPDATE_INTERVAL = 0.1
+
+# Number of chunks buffered across files before a single collection.add call
+INDEX_WRITE_BATCH_CHUNKS = 512
+
+# Upper bound on records per ChromaDB add/delete call (Chroma rejects
+# batches above its max_batch_size, which is ~5461 on SQLite)
+CHROMA_MAX_BATCH_SIZE = 5000
+
+# ============================================================================
+# VECTOR INDEX (HNSW) CONFIGURATION
+# ============================================================================
+
+# Applied when a ChromaDB collection is first created; existing collections keep
+# their original settings until they are deleted and rebuilt.
+# The distance space stays "l2": search confidence thresholds are calibrated for it.
+HNSW_SPACE = "l2"
+HNSW_CONSTRUCTION_EF = 200  # Higher = better graph quality, slower inserts
+HNSW_SEARCH_EF = 100        # Higher = better recall, slower queries
+HNSW_M = 16                 # Graph connectivity (neighbors per node)
+HNSW_NUM_THREADS = 0        # Threads used for index builds, 0 = CPU count
+
+# Embeddings are stored as float32. ChromaDB persists vectors as float32 and only
+# offers l2/ip/cosine spaces, so int8/binary quantization before add() would not
+# shrink the index and would break the distance calibration used for confidence.
+# To trade precision for memory, use a smaller embedding model instead.
+
+# Tip: the prebuilt chroma-hnswlib wheel may be compiled without AVX.
+# Rebuilding it locally enables SIMD distance kernels:
+#   pip install --no-binary :all: chroma-hnswlib
@@ -0,0 +1,184 @@
+"""
+FileFinder Embedding Batcher
+
+Dynamic batching front-end for SentenceTransformer models.
+Callers from any thread submit lists of texts; a single worker thread drains the
+queue, merges pending requests into one large batch (bounded by size and wait time)
+and runs a single encode call, so small per-file requests share forward passes.
+Embeddings are returned unit-normalized, matching how search queries are encoded.
+Recently encoded texts are kept in an LRU cache so duplicates are never re-encoded;
+the cache is keyed by a 16-byte BLAKE2b digest so it doesn't pin chunk strings in memory.
+"""
+
+import hashlib
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Dict, List
+
+import numpy as np
+
+# torch comes with sentence-transformers; guarded so the batcher stays usable without it
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+from config import (
+    EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_BATCH, EMBEDDING_MAX_WAIT_MS,
+    EMBEDDING_QUEUE_SIZE, EMBEDDING_CACHE_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+
+def inference_context():
+    """
+    torch.inference_mode() for encode calls: besides disabling gradients it skips
+    autograd version-counter/view tracking on every tensor. The mode is thread-local,
+    so it has to be entered on the thread that runs encode.
+    """
+    return torch.inference_mode() if TORCH_AVAILABLE else nullcontext()
+
+
+def _text_key(text: str) -> bytes:
+    """Cache key for a text: its 16-byte BLAKE2b digest"""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces encode requests from multiple producers into large model batches
+    """
+
+    def __init__(self, model, name: str = "embedder",
+                 max_batch: int = EMBEDDING_MAX_BATCH,
+                 max_wait_ms: float = EMBEDDING_MAX_WAIT_MS,
+                 max_queue: int = EMBEDDING_QUEUE_SIZE,
+                 cache_size: int = EMBEDDING_CACHE_SIZE):
+        self.model = model
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+
+        # LRU cache of text digest -> embedding so repeated chunks (license headers,
+        # identical boilerplate files) skip the transformer; owned by the worker thread
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._worker = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for encoding; the future resolves to an (N, D) numpy array"""
+        future = Future()
+        if not texts:
+            future.set_result(self.model.encode([], convert_to_numpy=True, show_progress_bar=False))
+            return future
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts: List[str]):
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(texts).result()
+
+    def _drain(self, first) -> list:
+        """Collect queued requests until the batch is full or the wait deadline passes"""
+        pending = [first]
+        pending_texts = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while pending_texts < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            pending_texts += len(item[0])
+        return pending
+
+    def _run(self):
+        encode = self.model.encode
+        get_request = self._queue.get
+        while True:
+            pending = self._drain(get_request())
+
+            # Skip requests whose callers already gave up
+            pending = [(texts, fut) for texts, fut in pending if fut.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+
+            all_texts = [text for texts, _ in pending for text in texts]
+            keys = [_text_key(text) for text in all_texts]
+
+            # Only encode texts that are neither cached nor repeated within this batch.
+            # Cache hits are read (and refreshed) before any insert, so inserting the
+            # new embeddings can't evict a hit before the batch is gathered
+            unique = dict(zip(keys, all_texts))
+            found = {key: self._cache_get(key) for key in unique if key in self._cache}
+            missing_keys = [key for key in unique if key not in found]
+            missing = [unique[key] for key in missing_keys]
+            self.cache_hits += len(all_texts) - len(missing)
+            self.cache_misses += len(missing)
+            try:
+                if missing:
+                    with inference_context():
+                        encoded = encode(
+                            missing,
+                            batch_size=EMBEDDING_BATCH_SIZE,
+                            convert_to_numpy=True,
+                            normalize_embeddings=True,
+                            show_progress_bar=False
+                        )
+                    for key, embedding in zip(missing_keys, encoded):
+                        found[key] = embedding
+                        self._cache_put(key, embedding)
+                if len(missing) == len(all_texts):
+                    # No cache hits or repeats: the encoder output already is the batch,
+                    # so skip the per-row gather and the extra (N, D) copy
+                    embeddings = encoded
+                else:
+                    embeddings = np.stack([found[key] for key in keys])
+            except Exception as e:
+                logger.error("%s: batch encode failed for %d texts: %s", self.name, len(all_texts), e)
+                for _, fut in pending:
+                    fut.set_exception(e)
+                continue
+
+            offset = 0
+            for texts, fut in pending:
+                fut.set_result(embeddings[offset:offset + len(texts)])
+                offset += len(texts)
+
+    def _cache_get(self, key: bytes):
+        embedding = self._cache[key]
+        self._cache.move_to_end(key)
+        return embedding
+
+    def _cache_put(self, key: bytes, embedding):
+        if self.cache_size <= 0:
+            return
+        # Store a private copy: results handed to callers are views into the encoder
+        # output, so in-place edits by a caller must not reach the cache
+        self._cache[key] = embedding.copy()
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counters of the embedding cache"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_ratio": (self.cache_hits / total) if total else 0.0,
+        }
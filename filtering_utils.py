@@ -7,7 +7,9 @@ and the branch manifest change detection system to ensure consistency.
 """
 
 import os
+import re
 import fnmatch
+from functools import lru_cache
 
 
 def is_hidden_path(path):
@@ -76,6 +78,82 @@ def filter_hidden_dirs(dirs):
         dirs.remove(hidden_dir)
 
 
+def _fnmatch_regex(pattern):
+    """fnmatch.translate() without the trailing end anchor so it can be embedded"""
+    regex = fnmatch.translate(pattern)
+    return regex[:-2] if regex.endswith('\\Z') else regex
+
+
+class ExclusionMatcher:
+    """Exclusion patterns precompiled into two alternation regexes
+    
+    Matches exactly what matches_exclusion_patterns() matches, but tests a path
+    with at most one regex scan plus one scan per path component.
+    """
+    
+    def __init__(self, exclude_patterns):
+        # fnmatch.fnmatch compares os.path.normcase'd strings
+        flags = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+        path_regexes = []     # matched against the whole relative path
+        name_regexes = []     # matched against each path component
+        absolute_regexes = []  # '/pattern' entries, also tried against bare file names
+        
+        for pattern in exclude_patterns:
+            pattern = pattern.replace('\\', '/').strip()
+            if not pattern:
+                continue
+            
+            if pattern.startswith('/'):
+                absolute_regexes.append(_fnmatch_regex(pattern[1:]))
+            elif pattern.endswith('/'):
+                # The directory itself or anything below it, at any depth
+                path_regexes.append(f"(?:.*/)?{_fnmatch_regex(pattern[:-1])}(?:/.*)?")
+            elif '/' in pattern:
+                path_regexes.append(f"(?:.*/)?{_fnmatch_regex(pattern)}")
+            else:
+                name_regexes.append(_fnmatch_regex(pattern))
+        
+        path_regexes.extend(absolute_regexes)
+        self._path_re = self._compile(path_regexes, flags)
+        self._name_re = self._compile(name_regexes, flags)
+        self._absolute_re = self._compile(absolute_regexes, flags)
+    
+    @staticmethod
+    def _compile(regexes, flags):
+        if not regexes:
+            return None
+        return re.compile('(?s:' + '|'.join(f'(?:{regex})' for regex in regexes) + r')\Z', flags)
+    
+    def matches(self, file_path):
+        """Check a repository-relative path against all patterns"""
+        file_path = file_path.replace('\\', '/')
+        if self._path_re is not None and self._path_re.match(file_path):
+            return True
+        if self._name_re is not None:
+            fullmatch_name = self._name_re.match
+            for part in file_path.split('/'):
+                if fullmatch_name(part):
+                    return True
+        return False
+    
+    def matches_entry(self, relative_path, name):
+        """Equivalent to matches(relative_path) or matches(name) for a file or directory entry"""
+        if self.matches(relative_path):
+            return True
+        # Only root-anchored patterns can match the bare name without matching the path
+        return self._absolute_re is not None and self._absolute_re.match(name) is not None
+
+
+@lru_cache(maxsize=64)
+def _compile_exclusion_patterns(exclude_patterns):
+    return ExclusionMatcher(exclude_patterns)
+
+
+def compile_exclusion_patterns(exclude_patterns):
+    """Get a cached ExclusionMatcher for a list of exclusion patterns"""
+    return _compile_exclusion_patterns(tuple(exclude_patterns or ()))
+
+
 def matches_exclusion_patterns(file_path, exclude_patterns):
     """Check if a file path matches any exclusion patterns
     
@@ -87,49 +165,8 @@ def matches_exclusion_patterns(file_path, exclude_patterns):
     """
     if not exclude_patterns:
         return False
-        
-    # Normalize path separators
-    file_path = file_path.replace('\\', '/')
     
-    for pattern in exclude_patterns:
-        pattern = pattern.replace('\\', '/')  # Normalize pattern separators
-        pattern = pattern.strip()  # Remove whitespace
-        
-        if not pattern:
-            continue
-            
-        # Handle different pattern types
-        if pattern.startswith('/'):
-            # Absolute path pattern (from root of repository)
-            if fnmatch.fnmatch(file_path, pattern[1:]):
-                return True
-        elif pattern.endswith('/'):
-            # Directory pattern - exclude the directory and all its contents
-            dir_pattern = pattern[:-1]  # Remove trailing slash
-            path_parts = file_path.split('/')
-            
-            # Check if any parent directory matches the pattern
-            for i, part in enumerate(path_parts[:-1]):  # Exclude filename from check
-                if fnmatch.fnmatch(part, dir_pattern):
-                    return True
-                    
-            # Also check if the pattern matches a path segment
-            for i in range(len(path_parts)):
-                partial_path = '/'.join(path_parts[:i+1])
-                if fnmatch.fnmatch(partial_path, f"*/{dir_pattern}") or fnmatch.fnmatch(partial_path, dir_pattern):
-                    return True
-        elif '/' in pattern:
-            # Path pattern with directories
-            if fnmatch.fnmatch(file_path, pattern) or fnmatch.fnmatch(file_path, f"*/{pattern}"):
-                return True
-        else:
-            # Simple pattern - check file names and directory names
-            path_parts = file_path.split('/')
-            for part in path_parts:
-                if fnmatch.fnmatch(part, pattern):
-                    return True
-                    
-    return False
+    return compile_exclusion_patterns(exclude_patterns).matches(file_path)
 
 
 def get_filtering_constants():
@@ -21,7 +21,9 @@ import json
 import time
 import sys
 import re
+import threading
 import hashlib
+import logging
 from collections import Counter, defaultdict
 from math import log, sqrt
 import numpy as np
@@ -39,6 +41,8 @@ except ImportError:
     print("Please ensure config.py exists in the same directory as main.py")
     sys.exit(1)
 
+logger = logging.getLogger(__name__)
+
 # Terminal colors and formatting
 class Colors:
     HEADER = '\033[95m'
@@ -285,6 +289,93 @@ def show_supported_formats():
     print(f"\n{Colors.WARNING}Note: Files starting with '.' or '~' are automatically skipped.{Colors.ENDC}")
     print()
 
+# Process-wide cache of loaded embedding models, keyed by model name
+_MODEL_CACHE = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def resolve_embedding_device():
+    """Pick the device for embedding models: FILEHAWK_DEVICE / EMBEDDING_DEVICE, else CUDA, MPS or CPU"""
+    requested = os.environ.get("FILEHAWK_DEVICE", EMBEDDING_DEVICE or "auto").strip().lower()
+    if requested and requested != "auto":
+        return requested
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda"
+        mps_backend = getattr(torch.backends, "mps", None)
+        if mps_backend is not None and mps_backend.is_available():
+            return "mps"
+    except Exception:
+        pass
+    return "cpu"
+
+def _quantized_onnx_model(model_name):
+    """
+    Local copy of model_name with a dynamically int8-quantized ONNX graph, exported on first use.
+    Returns (model directory, ONNX file name inside it).
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    
+    file_suffix = f"qint8_{EMBEDDING_ONNX_QUANTIZATION}"
+    file_name = f"onnx/model_{file_suffix}.onnx"
+    model_dir = MetadataTracker.app_data_dir_for(APP_NAME) / "models" / f"{model_name.replace('/', '__')}-{file_suffix}"
+    if not (model_dir / file_name).exists():
+        print_step(f"Quantizing {model_name} to int8 ({EMBEDDING_ONNX_QUANTIZATION})...")
+        onnx_model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        onnx_model.save(str(model_dir))
+        export_dynamic_quantized_onnx_model(onnx_model, EMBEDDING_ONNX_QUANTIZATION, str(model_dir),
+                                            file_suffix=file_suffix)
+    return str(model_dir), file_name
+
+def _apply_torch_precision(model, device):
+    """Apply the configured reduced-precision mode to a torch-backend model, in place"""
+    try:
+        if device == "cpu" and EMBEDDING_TORCH_INT8_CPU:
+            import torch
+            torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        elif device.startswith("cuda") and EMBEDDING_TORCH_FP16_GPU:
+            model.half()
+    except Exception as e:
+        print_warning(f"Could not apply reduced precision on {device}, using float32: {e}")
+    return model
+
+def _load_model_with_backend(model_name):
+    """Load a model on the configured inference backend and device, falling back to PyTorch"""
+    device = resolve_embedding_device()
+    if EMBEDDING_BACKEND == "onnx" and EMBEDDING_ONNX_QUANTIZATION and not EMBEDDING_BACKEND_FILE:
+        try:
+            model_dir, file_name = _quantized_onnx_model(model_name)
+            return SentenceTransformer(model_dir, device=device, backend="onnx",
+                                       model_kwargs={"file_name": file_name})
+        except Exception as e:
+            print_warning(f"Could not load int8 quantized {model_name}, using unquantized model: {e}")
+    if EMBEDDING_BACKEND and EMBEDDING_BACKEND != "torch":
+        backend_kwargs = {"backend": EMBEDDING_BACKEND}
+        if EMBEDDING_BACKEND_FILE:
+            backend_kwargs["model_kwargs"] = {"file_name": EMBEDDING_BACKEND_FILE}
+        try:
+            return SentenceTransformer(model_name, device=device, **backend_kwargs)
+        except Exception as e:
+            print_warning(f"Could not load {model_name} with {EMBEDDING_BACKEND} backend, using torch: {e}")
+    try:
+        return _apply_torch_precision(SentenceTransformer(model_name, device=device), device)
+    except Exception as e:
+        if device == "cpu":
+            raise
+        print_warning(f"Could not load {model_name} on {device}, using cpu: {e}")
+        return _apply_torch_precision(SentenceTransformer(model_name, device="cpu"), "cpu")
+
+def load_model(model_name):
+    """Load a SentenceTransformer once and share it across callers and threads"""
+    loaded = _MODEL_CACHE.get(model_name)
+    if loaded is None:
+        with _MODEL_CACHE_LOCK:
+            loaded = _MODEL_CACHE.get(model_name)
+            if loaded is None:
+                loaded = _load_model_with_backend(model_name)
+                _MODEL_CACHE[model_name] = loaded
+    return loaded
+
 # ---- INIT ----
 print_header("FileFinder - Initialization")
 
@@ -308,7 +399,7 @@ try:
         "message": "Downloading model weights...",
         "progress": 30
     })
-    model = SentenceTransformer(EMBEDDING_MODEL)
+    model = load_model(EMBEDDING_MODEL)
     model_loading_status.update({
         "is_loading": False,
         "progress": 100,
@@ -407,7 +498,9 @@ def extract_text(file_path):
         elif file_ext == '.msg':
             return extract_msg_text(file_path)
         else:
-            # All other file types - treat as plain text
+            # All other file types - treat as plain text, unless they are binary
+            if not is_probably_text(file_path, file_ext):
+                return ""
             return extract_plain_text(file_path)
             
     except Exception as e:
@@ -794,6 +887,23 @@ def extract_msg_text(file_path):
         print_error(f"Error extracting MSG text: {e}")
         return ""
 
+def is_probably_text(file_path, file_ext=None):
+    """
+    Cheap binary check for files read as plain text: known binary extensions are
+    rejected without opening the file, anything else by a NUL byte in its first
+    BINARY_SNIFF_BYTES bytes (UTF-8/Latin-1 text never contains one)
+    """
+    if file_ext is None:
+        file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext in BINARY_FILE_EXTENSIONS:
+        return False
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(BINARY_SNIFF_BYTES)
+    except OSError:
+        return False
+    return b'\x00' not in head
+
 def extract_plain_text(file_path):
     """Extract text from any file type as plain text"""
     with open(file_path, "r", encoding=DEFAULT_ENCODING, errors=ENCODING_ERROR_HANDLING) as f:
@@ -1032,11 +1142,8 @@ def create_gist_chunks(content, file_ext):
         should_add = True
         if GIST_ENABLE_DEDUPLICATION and chunk_embeddings:
             try:
-                # Use a simple model for deduplication (this could be optimized)
-                from sentence_transformers import SentenceTransformer
-                if 'dedup_model' not in globals():
-                    global dedup_model
-                    dedup_model = SentenceTransformer('all-MiniLM-L6-v2')  # Lightweight model for deduplication
+                # Use a simple model for deduplication, shared with the pinpoint/legacy model
+                dedup_model = load_model('all-MiniLM-L6-v2')  # Lightweight model for deduplication
                 
                 current_embedding = normalize_embedding(dedup_model.encode(chunk_text))
                 
@@ -1093,6 +1200,92 @@ def create_pinpoint_chunks(content, file_ext):
     
     return chunks
 
+def extract_and_chunk(fpath, file_ext, chunking_function):
+    """Extract and chunk a single file on an indexing worker thread; returns None if there is nothing to index"""
+    content = extract_text(fpath)
+    if not content.strip() or len(content.strip()) < MIN_CONTENT_LENGTH:
+        return None
+    
+    # Create chunks using the selected chunking function
+    return chunking_function(content, file_ext) or None
+
+def extract_chunks_for_update(file_path: str, chunking_function) -> list:
+    """Extract and chunk a file for a sync update; unreadable files get a placeholder chunk"""
+    # Extract content
+    content = extract_text(file_path)
+    if not content.strip():
+        print(f"⚠️ WARNING: File {file_path} extracted no content, using placeholder")
+        content = f"[Empty or unreadable content from {os.path.basename(file_path)}]"
+    else:
+        logger.debug("Extracted %d characters from %s", len(content), file_path)
+    
+    file_ext = os.path.splitext(file_path)[1].lower()
+    
+    # Create chunks
+    chunks = chunking_function(content, file_ext)
+    if not chunks:
+        print(f"⚠️ WARNING: No chunks created for {file_path}, creating fallback")
+        chunks = [(content[:1000] if content else f"[Fallback content for {os.path.basename(file_path)}]", [1])]
+    else:
+        logger.debug("Created %d chunks for %s with %s", len(chunks), file_path, chunking_function.__name__)
+    return chunks
+
+def add_chunks_batched(collection, model, documents, metadatas, ids):
+    """
+    Encode a file's chunks in one batched call and add them to the collection.
+    The (N, D) float32 array from encode is passed to ChromaDB as-is, in slices
+    of at most CHROMA_MAX_BATCH_SIZE records.
+    """
+    if not documents:
+        return
+    embeddings = model.encode(documents, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True, show_progress_bar=False)
+    for start in range(0, len(documents), CHROMA_MAX_BATCH_SIZE):
+        end = start + CHROMA_MAX_BATCH_SIZE
+        collection.add(
+            embeddings=embeddings[start:end],
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+            ids=ids[start:end]
+        )
+
+def encode_line_ranges(line_nums):
+    """
+    Encode a chunk's line numbers for ChromaDB metadata as compact runs,
+    e.g. [3, 4, 5, 6, 9] -> "3-6,9" (chunks are mostly contiguous lines)
+    """
+    runs = []
+    start = prev = None
+    for line_num in line_nums:
+        if prev is not None and line_num == prev + 1:
+            prev = line_num
+            continue
+        if start is not None:
+            runs.append(f"{start}-{prev}" if prev != start else str(start))
+        start = prev = line_num
+    if start is not None:
+        runs.append(f"{start}-{prev}" if prev != start else str(start))
+    return ",".join(runs)
+
+def decode_line_ranges(value):
+    """Decode line_ranges metadata back into a list of line numbers (also reads the old "[1, 2, 3]" format)"""
+    if not value:
+        return []
+    value = str(value).strip()
+    if value.startswith('['):
+        try:
+            return [int(line_num) for line_num in json.loads(value)]
+        except (ValueError, TypeError):
+            return []
+    
+    line_nums = []
+    for run in value.split(','):
+        start, _, end = run.partition('-')
+        try:
+            line_nums.extend(range(int(start), int(end or start) + 1))
+        except ValueError:
+            continue
+    return line_nums
+
 def index_folders(folders, chunking_mode='gist'):
     """Index multiple folders with metadata tracking to skip unchanged files"""
     if not folders:
@@ -1199,40 +1392,32 @@ def index_single_folder(folder, chunking_mode='gist'):
         if ENABLE_GRANULAR_CHUNKING:
             print_step(f"  Creating granular chunks (line-by-line)...")
             progress_bar(0, len(lines), "Granular indexing")
-            for i, line in enumerate(lines):
-                embedding = model.encode(line)
-                unique_id = f"granular-{fpath}-{i+1}"
-                granular_collection.add(
-                    embeddings=[embedding],
-                    documents=[line],
-                    metadatas=[{"path": fpath, "fname": fname, "line_num": i+1, "file_type": file_ext}],
-                    ids=[unique_id]
-                )
-                granular_chunks += 1
-                progress_bar(i+1, len(lines), "Granular indexing")
+            add_chunks_batched(
+                granular_collection, model, lines,
+                [{"path": fpath, "fname": fname, "line_num": i+1, "file_type": file_ext} for i in range(len(lines))],
+                [f"granular-{fpath}-{i+1}" for i in range(len(lines))]
+            )
+            granular_chunks += len(lines)
+            progress_bar(len(lines), len(lines), "Granular indexing")
         
         # Index file-level chunks (large chunks)
         print_step(f"  Creating file-level chunks (large sections)...")
         large_chunks = create_large_chunks(content, file_ext)
         progress_bar(0, len(large_chunks), "File-level indexing")
-        for chunk_idx, (chunk_text, line_ranges) in enumerate(large_chunks):
-            embedding = model.encode(chunk_text)
-            unique_id = f"filelevel-{fpath}-{chunk_idx+1}"
-            filelevel_collection.add(
-                embeddings=[embedding],
-                documents=[chunk_text],
-                metadatas=[{
-                    "path": fpath, 
-                    "fname": fname, 
-                    "file_type": file_ext,
-                    "chunk_id": chunk_idx + 1,
-                    "line_ranges": str(line_ranges),
-                    "chunk_size": len(line_ranges)
-                }],
-                ids=[unique_id]
-            )
-            filelevel_chunks += 1
-            progress_bar(chunk_idx+1, len(large_chunks), "File-level indexing")
+        add_chunks_batched(
+            filelevel_collection, model, [chunk_text for chunk_text, _ in large_chunks],
+            [{
+                "path": fpath, 
+                "fname": fname, 
+                "file_type": file_ext,
+                "chunk_id": chunk_idx + 1,
+                "line_ranges": encode_line_ranges(line_ranges),
+                "chunk_size": len(line_ranges)
+            } for chunk_idx, (_, line_ranges) in enumerate(large_chunks)],
+            [f"filelevel-{fpath}-{chunk_idx+1}" for chunk_idx in range(len(large_chunks))]
+        )
+        filelevel_chunks += len(large_chunks)
+        progress_bar(len(large_chunks), len(large_chunks), "File-level indexing")
         
         if ENABLE_GRANULAR_CHUNKING:
             print_success(f"{fname} | Granular: {len(lines)} chunks | File-level: {len(large_chunks)} chunks | Type: {file_ext}")
@@ -8,6 +8,8 @@ Maintains a sidecar JSON file alongside the ChromaDB database.
 import os
 import json
 import hashlib
+import tempfile
+import threading
 import time
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -21,10 +23,22 @@ class MetadataTracker:
         self.app_data_dir = self._get_app_data_dir()
         self.metadata_file = self.app_data_dir / "file_metadata.json"
         self.metadata: Dict[str, Dict] = {}
+        
+        # Nesting depth of begin_bulk()/commit_bulk(); while > 0 saves are deferred
+        self._bulk_depth = 0
+        self._bulk_dirty = False
+        self._bulk_lock = threading.Lock()
+        # Serializes sidecar writes from concurrent indexing, sync and reindex jobs
+        self._save_lock = threading.Lock()
         self.load_metadata()
     
     def _get_app_data_dir(self) -> Path:
         """Get platform-appropriate app data directory"""
+        return self.app_data_dir_for(self.app_name)
+    
+    @staticmethod
+    def app_data_dir_for(app_name: str) -> Path:
+        """Platform-appropriate app data directory for app_name, created if missing"""
         system = platform.system()
         
         if system == "Darwin":  # macOS
@@ -34,7 +48,7 @@ class MetadataTracker:
         else:  # Linux and others
             base_dir = Path.home() / ".local" / "share"
         
-        app_dir = base_dir / self.app_name
+        app_dir = base_dir / app_name
         app_dir.mkdir(parents=True, exist_ok=True)
         return app_dir
     
@@ -60,12 +74,26 @@ class MetadataTracker:
             print("No existing metadata found, starting fresh")
     
     def save_metadata(self):
-        """Save metadata to the sidecar file"""
-        try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving metadata: {e}")
+        """Save metadata to the sidecar file (deferred while a bulk update is open)"""
+        with self._bulk_lock:
+            if self._bulk_depth > 0:
+                self._bulk_dirty = True
+                return
+        self._save_metadata()
+    
+    def begin_bulk(self):
+        """Start a bulk update: metadata changes stay in memory until commit_bulk()"""
+        with self._bulk_lock:
+            self._bulk_depth += 1
+    
+    def commit_bulk(self):
+        """End a bulk update, writing the sidecar once if anything changed"""
+        with self._bulk_lock:
+            self._bulk_depth = max(0, self._bulk_depth - 1)
+            if self._bulk_depth > 0 or not self._bulk_dirty:
+                return
+            self._bulk_dirty = False
+        self._save_metadata()
     
     def calculate_file_hash(self, file_path: str) -> str:
         """Calculate SHA-256 hash of file content"""
@@ -93,10 +121,15 @@ class MetadataTracker:
             print(f"Error getting stats for {file_path}: {e}")
             return "", 0, 0
     
-    def is_file_unchanged(self, file_path: str, chunking_mode: str) -> bool:
+    def is_file_unchanged(self, file_path: str, chunking_mode: str,
+                          known_stat: Optional[Tuple[float, int]] = None) -> bool:
         """
         Check if file has changed since last indexing for a specific chunking mode
         
+        Args:
+            known_stat: Optional (mtime, size) already obtained by the caller; a
+                        mismatch is reported as changed without hashing the file
+        
         Returns:
             True if file is unchanged and can be skipped
             False if file needs re-indexing
@@ -112,6 +145,12 @@ class MetadataTracker:
         
         mode_info = file_info['modes'][chunking_mode]
         
+        if known_stat is not None:
+            known_mtime, known_size = known_stat
+            if (known_size != mode_info.get('file_size', 0) or
+                    abs(known_mtime - mode_info.get('last_modified', 0)) >= 1.0):
+                return False
+        
         # Get current file stats
         current_hash, current_mtime, current_size = self.get_file_stats(file_path)
         
@@ -171,6 +210,26 @@ class MetadataTracker:
         
         self.save_metadata()
     
+    def remove_files_metadata(self, file_paths: List[str], chunking_mode: Optional[str] = None):
+        """Remove metadata for several files (or one mode of them) with a single save"""
+        removed = False
+        for file_path in file_paths:
+            file_info = self.metadata.get(file_path)
+            if file_info is None:
+                continue
+            
+            if chunking_mode is None:
+                del self.metadata[file_path]
+                removed = True
+            elif 'modes' in file_info and chunking_mode in file_info['modes']:
+                del file_info['modes'][chunking_mode]
+                if not file_info['modes']:
+                    del self.metadata[file_path]
+                removed = True
+        
+        if removed:
+            self.save_metadata()
+    
     def get_indexing_stats(self) -> Dict:
         """Get statistics about indexed files with proper multi-mode tracking"""
         # Count unique files across all modes
@@ -193,25 +252,17 @@ class MetadataTracker:
                         mode_stats[mode]['chunks'] += chunks_for_mode
                         total_chunks += chunks_for_mode
         
-        # Also get direct stats from ChromaDB collections for verification
+        # Also report ChromaDB chunk counts for verification; count() avoids reading
+        # chunk rows, file-level numbers above come from the sidecar
         try:
             from api import gist_collection, pinpoint_collection
             
-            try:
-                gist_results = gist_collection.get()
-                if gist_results and gist_results.get('metadatas'):
-                    gist_files = {meta.get('path') for meta in gist_results['metadatas'] if meta.get('path') and meta.get('path') != 'None'}
-                    print(f"ChromaDB Gist collection: {len(gist_files)} unique files, {len(gist_results['metadatas'])} total chunks")
-            except Exception as e:
-                print(f"Warning: Could not get gist collection stats: {e}")
-            
-            try:
-                pinpoint_results = pinpoint_collection.get()
-                if pinpoint_results and pinpoint_results.get('metadatas'):
-                    pinpoint_files = {meta.get('path') for meta in pinpoint_results['metadatas'] if meta.get('path') and meta.get('path') != 'None'}
-                    print(f"ChromaDB Pinpoint collection: {len(pinpoint_files)} unique files, {len(pinpoint_results['metadatas'])} total chunks")
-            except Exception as e:
-                print(f"Warning: Could not get pinpoint collection stats: {e}")
+            for name, collection in (("Gist", gist_collection), ("Pinpoint", pinpoint_collection)):
+                try:
+                    if collection:
+                        print(f"ChromaDB {name} collection: {collection.count()} total chunks")
+                except Exception as e:
+                    print(f"Warning: Could not get {name.lower()} collection stats: {e}")
                 
         except ImportError:
             print("Collections not available, using metadata only")
@@ -229,16 +280,19 @@ class MetadataTracker:
         existing_set = set(existing_files)
         orphaned = [path for path in self.metadata.keys() if path not in existing_set]
         
-        for path in orphaned:
-            self.remove_file_metadata(path)  # Remove all modes for this file
+        self.remove_files_metadata(orphaned)  # Remove all modes for these files
         
         if orphaned:
             print(f"Cleaned up metadata for {len(orphaned)} orphaned files")
     
-    def get_files_to_index(self, file_paths: List[str], chunking_mode: str) -> Tuple[List[str], List[str]]:
+    def get_files_to_index(self, file_paths: List[str], chunking_mode: str,
+                           file_stats: Optional[Dict[str, Tuple[float, int]]] = None) -> Tuple[List[str], List[str]]:
         """
         Determine which files need indexing vs can be skipped for a specific chunking mode
         
+        Args:
+            file_stats: Optional path -> (mtime, size) map from the directory scan
+        
         Returns:
             Tuple of (files_to_index, files_to_skip)
         """
@@ -246,7 +300,8 @@ class MetadataTracker:
         files_to_skip = []
         
         for file_path in file_paths:
-            if self.is_file_unchanged(file_path, chunking_mode):
+            known_stat = file_stats.get(file_path) if file_stats else None
+            if self.is_file_unchanged(file_path, chunking_mode, known_stat):
                 files_to_skip.append(file_path)
             else:
                 files_to_index.append(file_path)
@@ -371,18 +426,29 @@ class MetadataTracker:
         
         if migrated != loaded_metadata:
             print(f"Migrated metadata format for {len(migrated)} files")
-            self.save_metadata = lambda: self._save_metadata(migrated)
-            self.save_metadata()
+            self._save_metadata(migrated)
         
         return migrated
     
     def _save_metadata(self, metadata_to_save: Dict = None):
-        """Internal save method for migration"""
-        try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata_to_save or self.metadata, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving metadata: {e}")
+        """Write metadata to a unique temporary file and atomically replace the sidecar"""
+        with self._save_lock:
+            tmp_file = None
+            try:
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.metadata_file.parent,
+                                                 prefix=self.metadata_file.name + '.', suffix='.tmp',
+                                                 delete=False) as f:
+                    tmp_file = f.name
+                    json.dump(metadata_to_save if metadata_to_save is not None else self.metadata,
+                              f, indent=2, ensure_ascii=False)
+                os.replace(tmp_file, self.metadata_file)
+            except Exception as e:
+                print(f"Error saving metadata: {e}")
+                if tmp_file and os.path.exists(tmp_file):
+                    try:
+                        os.remove(tmp_file)
+                    except OSError:
+                        pass
     
     def clear_all_metadata(self):
         """Clear all metadata - used for complete data deletion"""